@@ -0,0 +1,175 @@
+import csv
+import math
+from operator import mul, sub
+
+import numpy as np
+
+from kepler import elementen
+
+
+# Houdt tijdens de simulatie per sample de omlooptellingen, de lopende
+# omloopverhouding en de resonantiehoek bij. Elke update kost O(1), dus
+# tussentijdse rapporten hoeven de hoeklijsten nooit opnieuw te doorlopen.
+class OnlineAnalyse:
+    def __init__(self, binnen, buiten, p=2, q=1):
+        # Resonantie p:q tussen 'binnen' en 'buiten' (Io:Europa = 2:1);
+        # resonantiehoek φ = p·λ_buiten − q·λ_binnen − (p − q)·ϖ_binnen
+        self.binnen, self.buiten = binnen, buiten
+        self.p, self.q = p, q
+        self.omlopen = {binnen: 0, buiten: 0}
+        self.vorige = {}
+        self.samples = 0
+        self.phi = None
+        self._som_cos = 0.0
+        self._som_sin = 0.0
+
+    # Eén omloop = overgang van hoek < 0 naar hoek >= 0 (zoals tel_omlopen)
+    def _tel(self, naam, theta):
+        if self.vorige.get(naam, 0) < 0 <= theta:
+            self.omlopen[naam] += 1
+        self.vorige[naam] = theta
+
+    # Verwerk één sample: positie en snelheid van beide lichamen t.o.v. het centrale lichaam
+    def sample(self, pos_binnen, vel_binnen, pos_buiten, vel_buiten, mu_binnen, mu_buiten):
+        self._tel(self.binnen, math.atan2(pos_binnen[1], pos_binnen[0]))
+        self._tel(self.buiten, math.atan2(pos_buiten[1], pos_buiten[0]))
+
+        _, _, varpi, lam_binnen = elementen(np.asarray(pos_binnen), np.asarray(vel_binnen), mu_binnen)
+        _, _, _, lam_buiten = elementen(np.asarray(pos_buiten), np.asarray(vel_buiten), mu_buiten)
+        phi = self.p * lam_buiten - self.q * lam_binnen - (self.p - self.q) * varpi
+        self.phi = math.remainder(float(phi), 2 * math.pi)
+        self._som_cos += math.cos(self.phi)
+        self._som_sin += math.sin(self.phi)
+        self.samples += 1
+
+    # Lopende omloopverhouding binnen/buiten (None zolang 'buiten' nog geen omloop heeft)
+    def verhouding(self):
+        n_buiten = self.omlopen[self.buiten]
+        return self.omlopen[self.binnen] / n_buiten if n_buiten else None
+
+    # Circulair gemiddelde van φ en de lengte R van de gemiddelde eenheidsvector:
+    # R dicht bij 1 = φ libreert rond het gemiddelde, R dicht bij 0 = φ circuleert
+    def resonantiehoek_gemiddelde(self):
+        if self.samples == 0:
+            return None, 0.0
+        gemiddelde = math.atan2(self._som_sin, self._som_cos)
+        R = math.hypot(self._som_sin, self._som_cos) / self.samples
+        return gemiddelde, R
+
+    def rapport(self, dagen):
+        n1, n2 = self.omlopen[self.binnen], self.omlopen[self.buiten]
+        verhouding = self.verhouding()
+        gemiddelde, R = self.resonantiehoek_gemiddelde()
+        tekst = f"Na {dagen:.0f} dagen: {self.binnen} omlopen={n1}, {self.buiten} omlopen={n2}"
+        if verhouding is not None:
+            tekst += f", verhouding ≈ {verhouding:.4f}"
+        if gemiddelde is not None:
+            tekst += f", φ = {math.degrees(self.phi):.1f}° (gem. {math.degrees(gemiddelde):.1f}°, R = {R:.3f})"
+        return tekst
+
+
+# Kubische Hermite-interpolatie tussen twee opeenvolgende stappen van lengte h, per
+# component als polynoom in s ∈ [0, 1]: x(s) = ((a s + b) s + c) s + d. Geeft per
+# component (a, b, c, d), als gewone floats: de bisectie evalueert hem 50 keer per gebeurtenis.
+def _hermite(h, x0, v0, x1, v1):
+    kubisch = []
+    for p0, m0, p1, m1 in zip(x0, v0, x1, v1):
+        m0, m1 = m0 * h, m1 * h
+        kubisch.append((2 * p0 + m0 - 2 * p1 + m1, -3 * p0 - 2 * m0 + 3 * p1 - m1, m0, p0))
+    return kubisch
+
+
+# Zoek met bisectie de s in [0, 1] waar f(x(s), v(s)) van teken wisselt (f(0) < 0 <= f(1));
+# x en v zijn de geïnterpoleerde positie en snelheid als lijsten
+def _wortel(f, h, x0, v0, x1, v1, iteraties=50):
+    kubisch = _hermite(h, x0, v0, x1, v1)
+    lo, hi = 0.0, 1.0
+    for _ in range(iteraties):
+        s = (lo + hi) / 2
+        x = [((a * s + b) * s + c) * s + d for a, b, c, d in kubisch]
+        v = [((3 * a * s + 2 * b) * s + c) / h for a, b, c, d in kubisch]
+        if f(x, v) < 0:
+            lo = s
+        else:
+            hi = s
+    return (lo + hi) / 2
+
+
+# r·v van twee vectoren als lijsten (het teken van de radiale snelheid)
+def _inproduct(x, u):
+    return sum(map(mul, x, u))
+
+
+# Detecteert tijdens de integratie, na elke stap, de exacte tijdstippen van
+#   "doorgang":  de hoek t.o.v. het centrale lichaam gaat van < 0 naar >= 0, d.w.z. y
+#                wisselt van negatief naar positief (dezelfde gebeurtenis als in
+#                tel_omlopen, maar niet op een 10-dagengrid). Tegen de klok in ligt die
+#                op de positieve x-as, met de klok mee (richting -1) op de negatieve.
+#   "periapsis": de radiale snelheid wisselt van negatief naar positief
+# Per stap wordt alleen het teken van y en r·v getoetst (met gewone floats); alleen bij
+# een wisseling wordt het tijdstip bepaald door kubische Hermite-interpolatie van
+# positie en snelheid. Het resultaat is een compact logboek (t, lichaam, soort).
+class GebeurtenisDetector:
+    def __init__(self, namen, centrum=0):
+        self.namen = list(namen)
+        self.centrum = centrum
+        self.andere = [i for i in range(len(self.namen)) if i != centrum]
+        self.log = []
+        self._eerste = {}
+        self._laatste = {}
+        self._aantal = {}
+        self._vorige = None
+
+    def _noteer(self, t, naam, soort):
+        self.log.append((t, naam, soort))
+        sleutel = (naam, soort)
+        self._eerste.setdefault(sleutel, t)
+        self._laatste[sleutel] = t
+        self._aantal[sleutel] = self._aantal.get(sleutel, 0) + 1
+
+    # Relatieve positie en snelheid van lichaam k (lijsten van floats)
+    def _relatief(self, p, v, k):
+        c = self.centrum
+        return list(map(sub, p[k], p[c])), list(map(sub, v[k], v[c]))
+
+    # Tijdstip van de wisseling van f tussen de vorige stap en deze, in het logboek
+    def _zoek(self, f, t0, t, vorige, huidige, k, soort):
+        r0, v0 = self._relatief(*vorige, k)
+        r, v = self._relatief(*huidige, k)
+        s = _wortel(f, t - t0, r0, v0, r, v)
+        self._noteer(t0 + s * (t - t0), self.namen[k], soort)
+
+    # Aanroepen na elke stap met de tijd t en de volledige posities en snelheden
+    def stap(self, t, pos, vel):
+        p, v = pos.tolist(), vel.tolist()
+        tekens = []
+        for k in self.andere:
+            r, u = self._relatief(p, v, k)
+            tekens.append((r[1], _inproduct(r, u)))
+        if self._vorige is not None:
+            t0, p0, v0, tekens0 = self._vorige
+            for k, (y0, _), (y, _) in zip(self.andere, tekens0, tekens):
+                if y0 < 0 <= y:
+                    self._zoek(lambda x, _: x[1], t0, t, (p0, v0), (p, v), k, "doorgang")
+            for k, (_, rv0), (_, rv) in zip(self.andere, tekens0, tekens):
+                if rv0 < 0 <= rv:
+                    self._zoek(_inproduct, t0, t, (p0, v0), (p, v), k, "periapsis")
+        self._vorige = (t, p, v, tekens)
+
+    # Aantal gebeurtenissen van een soort voor een lichaam
+    def aantal(self, naam, soort="doorgang"):
+        return self._aantal.get((naam, soort), 0)
+
+    # Gemiddelde periode tussen opeenvolgende gebeurtenissen (None bij minder dan 2)
+    def periode(self, naam, soort="doorgang"):
+        n = self.aantal(naam, soort)
+        if n < 2:
+            return None
+        return (self._laatste[(naam, soort)] - self._eerste[(naam, soort)]) / (n - 1)
+
+    # Logboek als CSV: t (s), lichaam, soort
+    def naar_csv(self, pad):
+        with open(pad, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["t", "lichaam", "soort"])
+            writer.writerows(self.log)
@@ -0,0 +1,224 @@
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import time
+import tracemalloc
+
+import numpy as np
+
+from nbody import G, energie, impulsmoment, simuleer
+from integratoren import INTEGRATOREN
+from kernel import KERNEL_METHODEN, NUMBA, simuleer_snel
+from boomcode import io_europa_schijf, stap_leapfrog_boom
+from kepler import kepler_drift
+from configuratie import lees_config, bouw_systeem
+
+SYSTEMEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "systemen")
+
+
+# Begintoestand en dt uit een config in systemen/
+def _uit_config(naam):
+    config = lees_config(os.path.join(SYSTEMEN, f"{naam}.json"))
+    _, massas, pos, vel = bouw_systeem(config, cache=False)
+    return pos, vel, massas, config["integrator"]["dt"]
+
+
+# Twee lichamen (Jupiter en een maan op e = 0.2) rond het gezamenlijke zwaartepunt;
+# de relatieve baan is exact een Keplerellips
+def _kepler_begin(M=1.898e27, m=8.93e22, a=4.22e8, e=0.2):
+    mu = G * (M + m)
+    r = a * (1 - e)
+    v = math.sqrt(mu * (2 / r - 1 / a))
+    rel_pos, rel_vel = np.array([r, 0.0]), np.array([0.0, v])
+    massas = np.array([M, m])
+    pos = np.stack([-m / (M + m) * rel_pos, M / (M + m) * rel_pos])
+    vel = np.stack([-m / (M + m) * rel_vel, M / (M + m) * rel_vel])
+    return pos, vel, massas, mu, a
+
+
+def _kepler_exact(pos0, vel0, massas, t):
+    mu = G * np.sum(massas)
+    rel, _ = kepler_drift(pos0[1] - pos0[0], vel0[1] - vel0[0], mu, t)
+    return rel
+
+
+# Een benchmarkscenario: begintoestand, tijdstap, standaard aantal stappen en de backends
+# die erop gedraaid worden. 'exact' geeft (optioneel) de analytische relatieve positie na t seconden.
+def scenario(naam):
+    if naam == "io_europa":
+        pos, vel, massas, dt = _uit_config("io_europa")
+        return dict(pos=pos, vel=vel, massas=massas, dt=dt, stappen=20000, schaal=4.217e8,
+                    backends=["numpy", "kernel"])
+    if naam == "gliese876_bc":
+        pos, vel, massas, dt = _uit_config("gliese876_bc")
+        return dict(pos=pos, vel=vel, massas=massas, dt=dt, stappen=20000, schaal=1.9448e10,
+                    backends=["numpy", "kernel"])
+    if naam == "kepler":
+        pos, vel, massas, mu, a = _kepler_begin()
+        return dict(pos=pos, vel=vel, massas=massas, dt=3600.0, stappen=20000, schaal=a,
+                    backends=["numpy", "kernel"], exact=_kepler_exact)
+    # Schijf van testdeeltjes rond Io/Europa; energie en impulsmoment zijn die van de
+    # massieve lichamen (testdeeltjes dragen niets bij, zie nbody.energie). Geen boom:
+    # zonder massa in de knopen valt er voor de boom niets te benaderen.
+    if naam in ("schijf_1k", "schijf_10k"):
+        n = 1000 if naam == "schijf_1k" else 10000
+        pos, vel, massas = io_europa_schijf(n - 3, deeltjesmassa=0.0)
+        return dict(pos=pos, vel=vel, massas=massas, dt=3600.0,
+                    stappen=200 if n == 1000 else 20, schaal=4.22e8,
+                    backends=["numpy", "kernel"])
+    # Schijf van deeltjes met massa (samen ongeveer een maan): hier trekken alle deeltjes
+    # aan elkaar en is de boom tegen de directe som een eerlijke vergelijking
+    if naam in ("schijf_massief_1k", "schijf_massief_4k"):
+        n = 1000 if naam == "schijf_massief_1k" else 4000
+        pos, vel, massas = io_europa_schijf(n - 3, deeltjesmassa=1e22 / n)
+        return dict(pos=pos, vel=vel, massas=massas, dt=3600.0,
+                    stappen=50 if n == 1000 else 10, schaal=4.22e8,
+                    backends=["numpy", "kernel", "boom"])
+    raise ValueError(f"onbekend scenario {naam!r}")
+
+
+SCENARIOS = ("io_europa", "gliese876_bc", "kepler", "schijf_1k", "schijf_10k",
+             "schijf_massief_1k", "schijf_massief_4k")
+
+
+# Methoden per backend
+def methoden(backend):
+    if backend == "numpy":
+        return [m for m in INTEGRATOREN if m != "leapfrog_boom"]
+    if backend == "kernel":
+        return list(KERNEL_METHODEN)
+    if backend == "boom":
+        return ["leapfrog"]
+    raise ValueError(f"onbekende backend {backend!r}")
+
+
+# Functie die stappen [begin, eind) integreert en het aantal krachtevaluaties teruggeeft
+def _motor(backend, methode, massas, dt):
+    if backend == "kernel":
+        def draai(pos, vel, begin, eind):
+            simuleer_snel(pos, vel, massas, dt, eind, lambda s: s < 0, methode=methode, start=begin)
+            return eind - begin
+        return draai
+
+    stapfunctie = stap_leapfrog_boom if backend == "boom" else INTEGRATOREN[methode]
+    teller = [0]
+
+    def tel(pos, vel, massas, dt, G):
+        teller[0] += stapfunctie(pos, vel, massas, dt, G)
+
+    def draai(pos, vel, begin, eind):
+        teller[0] = 0
+        simuleer(pos, vel, massas, dt, eind, stapfunctie=tel, start=begin)
+        return teller[0]
+    return draai
+
+
+# Eén benchmark: 'controles' keer wordt de run onderbroken om energie en impulsmoment
+# te meten; die metingen tellen niet mee in de rekentijd. De geheugenpiek wordt apart
+# gemeten (tracemalloc vertraagt de run) over een korte run van dezelfde opzet.
+def meet(naam, backend, methode, stappen=None, controles=20):
+    s = scenario(naam)
+    stappen = stappen or s["stappen"]
+    massas, dt = s["massas"], s["dt"]
+    draai = _motor(backend, methode, massas, dt)
+
+    # Opwarmen (o.a. numba-compilatie) op een kopie
+    draai(s["pos"].copy(), s["vel"].copy(), 0, 1)
+
+    tracemalloc.start()
+    draai(s["pos"].copy(), s["vel"].copy(), 0, min(stappen, 10))
+    piek = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    pos, vel = s["pos"].copy(), s["vel"].copy()
+    E0, L0 = energie(pos, vel, massas), impulsmoment(pos, vel, massas)
+    max_dE = max_dL = 0.0
+    duur, evaluaties = 0.0, 0
+    grenzen = np.linspace(0, stappen, controles + 1).astype(int)
+    for begin, eind in zip(grenzen[:-1], grenzen[1:]):
+        t0 = time.perf_counter()
+        evaluaties += draai(pos, vel, int(begin), int(eind))
+        duur += time.perf_counter() - t0
+        dE = abs((energie(pos, vel, massas) - E0) / E0)
+        dL = float(np.max(np.abs((impulsmoment(pos, vel, massas) - L0) / L0)))
+        max_dE, max_dL = max(max_dE, dE), max(max_dL, dL)
+
+    resultaat = {
+        "scenario": naam, "backend": backend, "methode": methode,
+        "lichamen": len(massas), "stappen": stappen, "dt": dt, "duur_s": duur,
+        "stappen_per_s": stappen / duur, "krachtevaluaties_per_s": evaluaties / duur,
+        "piekgeheugen_mb": piek / 2**20,
+        "rel_energiefout": dE, "max_rel_energiefout": max_dE,
+        "rel_impulsmomentfout": dL, "max_rel_impulsmomentfout": max_dL,
+    }
+    if "exact" in s:
+        rel = s["exact"](s["pos"], s["vel"], massas, stappen * dt)
+        resultaat["rel_positiefout"] = float(np.linalg.norm(pos[1] - pos[0] - rel) / s["schaal"])
+    return resultaat
+
+
+def regel(r):
+    tekst = (f"{r['scenario']:>13} {r['backend']:>6} {r['methode']:>13}: "
+             f"{r['stappen_per_s']:10.0f} stappen/s, {r['krachtevaluaties_per_s']:10.0f} evaluaties/s, "
+             f"{r['piekgeheugen_mb']:8.3f} MB, |dE/E| = {r['max_rel_energiefout']:.2e}, "
+             f"|dL/L| = {r['max_rel_impulsmomentfout']:.2e}")
+    if "rel_positiefout" in r:
+        tekst += f", |dr|/a = {r['rel_positiefout']:.2e}"
+    return tekst
+
+
+# Vergelijk met een eerder resultatenbestand: verhouding stappen/s en energiefout per geval
+def vergelijk(oud, nieuw):
+    sleutel = lambda r: (r["scenario"], r["backend"], r["methode"])
+    eerder = {sleutel(r): r for r in oud["resultaten"]}
+    for r in nieuw["resultaten"]:
+        o = eerder.get(sleutel(r))
+        if o is None:
+            continue
+        snelheid = r["stappen_per_s"] / o["stappen_per_s"]
+        teken = "⚠️ " if snelheid < 0.9 else "   "
+        print(f"{teken}{' '.join(sleutel(r)):>36}: {snelheid:5.2f}x stappen/s, "
+              f"|dE/E| {o['max_rel_energiefout']:.1e} → {r['max_rel_energiefout']:.1e}")
+
+
+def benchmark(scenarios=SCENARIOS, backends=None, methodes=None, schaal=1.0):
+    resultaten = []
+    for naam in scenarios:
+        s = scenario(naam)
+        for backend in s["backends"]:
+            if backends and backend not in backends:
+                continue
+            for methode in methoden(backend):
+                if methodes and methode not in methodes:
+                    continue
+                r = meet(naam, backend, methode, max(1, int(s["stappen"] * schaal)))
+                print(regel(r))
+                resultaten.append(r)
+    meta = {
+        "datum": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(), "numpy": np.__version__, "numba": NUMBA,
+        "platform": platform.platform(), "processor": platform.processor(),
+    }
+    return {"meta": meta, "resultaten": resultaten}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark van integratoren en backends op vaste scenario's")
+    parser.add_argument("--scenario", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--backend", nargs="+", choices=["numpy", "kernel", "boom"])
+    parser.add_argument("--methode", nargs="+", choices=sorted(INTEGRATOREN))
+    parser.add_argument("--schaal", type=float, default=1.0, help="factor op het aantal stappen per scenario")
+    parser.add_argument("--uitvoer", default="benchmark.json")
+    parser.add_argument("--vergelijk", help="eerder resultatenbestand om mee te vergelijken")
+    args = parser.parse_args()
+
+    uitslag = benchmark(args.scenario, args.backend, args.methode, args.schaal)
+    with open(args.uitvoer, "w") as f:
+        json.dump(uitslag, f, indent=2)
+    print(f"✅ Resultaten opgeslagen in '{args.uitvoer}'.")
+    if args.vergelijk:
+        with open(args.vergelijk) as f:
+            vergelijk(json.load(f), uitslag)
@@ -0,0 +1,135 @@
+import argparse
+import time
+
+import numpy as np
+
+from nbody import G, versnellingen
+
+
+# Knoop van de Barnes-Hut-boom (quadtree in 2D, octree in 3D)
+class Knoop:
+    def __init__(self, centrum, halve_breedte, indices, pos, massas, blad):
+        self.halve_breedte = halve_breedte
+        self.massa = np.sum(massas[indices])
+        if self.massa > 0:
+            self.zwaartepunt = np.sum(massas[indices, None] * pos[indices], axis=0) / self.massa
+        else:
+            self.zwaartepunt = centrum.copy()
+        self.kinderen = []
+        self.indices = None
+
+        # Blad: weinig deeltjes, of alle deeltjes op (bijna) dezelfde plek
+        if len(indices) <= blad or halve_breedte < 1e-9 * (np.max(np.abs(centrum)) + 1):
+            self.indices = indices
+            return
+
+        # Verdeel over 2^D deelcellen op basis van de positie t.o.v. het centrum
+        boven = pos[indices] >= centrum
+        code = np.sum(boven * (1 << np.arange(pos.shape[1])), axis=1)
+        for c in range(1 << pos.shape[1]):
+            deel = indices[code == c]
+            if len(deel):
+                richting = np.where((c >> np.arange(pos.shape[1])) & 1, 1.0, -1.0)
+                self.kinderen.append(Knoop(centrum + richting * halve_breedte / 2, halve_breedte / 2,
+                                           deel, pos, massas, blad))
+
+
+def bouw_boom(pos, massas, blad=8):
+    laag, hoog = pos.min(axis=0), pos.max(axis=0)
+    centrum = (laag + hoog) / 2
+    halve_breedte = np.max(hoog - laag) / 2 * (1 + 1e-9) + 1e-300
+    return Knoop(centrum, halve_breedte, np.arange(len(pos)), pos, massas, blad)
+
+
+# Loop de boom af voor een hele groep deeltjes tegelijk.
+# Voor elke knoop worden de deeltjes gesplitst: wie ver genoeg weg is (breedte / afstand < theta)
+# krijgt de kracht van het zwaartepunt van de knoop, de rest daalt af naar de kinderen.
+# In een blad wordt direct gesommeerd.
+def _loop_af(knoop, idx, pos, massas, acc, theta, G, eps2):
+    if knoop.massa == 0:
+        return
+    if knoop.indices is not None:
+        d = pos[knoop.indices][None, :, :] - pos[idx][:, None, :]
+        r2 = np.einsum("ijk,ijk->ij", d, d) + eps2
+        zelf = idx[:, None] == knoop.indices[None, :]
+        r2[zelf] = np.inf
+        factor = G * massas[knoop.indices][None, :] / (r2 * np.sqrt(r2))
+        acc[idx] += np.einsum("ij,ijk->ik", factor, d)
+        return
+
+    d = knoop.zwaartepunt - pos[idx]
+    r2 = np.einsum("ij,ij->i", d, d) + eps2
+    ver = (2 * knoop.halve_breedte) ** 2 < theta**2 * r2
+    if np.any(ver):
+        acc[idx[ver]] += G * knoop.massa * d[ver] / (r2[ver] * np.sqrt(r2[ver]))[:, None]
+    dichtbij = idx[~ver]
+    if len(dichtbij):
+        for kind in knoop.kinderen:
+            _loop_af(kind, dichtbij, pos, massas, acc, theta, G, eps2)
+
+
+# Versnellingen met de Barnes-Hut-benadering, O(N log N).
+# Zelfde vorm als nbody.versnellingen (pos (N, D), massas (N,)), zonder batch-dimensies.
+# theta is de openingshoek: 0 = exact (directe som), groter = sneller maar minder nauwkeurig.
+def versnellingen_boom(pos, massas, G=G, theta=0.5, blad=8, zachtheid=0.0):
+    massas = np.asarray(massas, dtype=float)
+    boom = bouw_boom(pos, massas, blad)
+    acc = np.zeros_like(pos)
+    _loop_af(boom, np.arange(len(pos)), pos, massas, acc, theta, G, zachtheid**2)
+    return acc
+
+
+# Leapfrog-stap (drift-kick-drift) met boomkrachten; zelfde vorm als de stapfuncties
+# in integratoren.py, zodat hij ook via nbody.simuleer(..., stapfunctie=...) werkt
+def stap_leapfrog_boom(pos, vel, massas, dt, G=G, theta=0.5):
+    pos += vel * (dt / 2)
+    vel += versnellingen_boom(pos, massas, G, theta) * dt
+    pos += vel * (dt / 2)
+    return 1
+
+
+# Io/Europa-opzet plus een schijf van n lichte deeltjes tussen r_min en r_max om Jupiter
+def io_europa_schijf(n, r_min=3.0e8, r_max=1.0e9, deeltjesmassa=1e15, seed=0):
+    rng = np.random.default_rng(seed)
+    M = 1.898e27
+    r = np.concatenate([[0.0, 4.22e8, 6.71e8], rng.uniform(r_min, r_max, n)])
+    fase = np.concatenate([[0.0, 0.0, 2.0], rng.uniform(0, 2 * np.pi, n)])
+    massas = np.concatenate([[M, 8.93e22, 4.8e22], np.full(n, deeltjesmassa)])
+    v = np.zeros_like(r)
+    v[1:] = np.sqrt(G * M / r[1:])
+    pos = np.stack([r * np.cos(fase), r * np.sin(fase)], axis=-1)
+    vel = np.stack([-v * np.sin(fase), v * np.cos(fase)], axis=-1)
+    return pos, vel, massas
+
+
+# Vergelijk nauwkeurigheid en rekentijd van de boom met de directe som
+def vergelijk(n, thetas, herhalingen=3):
+    pos, _, massas = io_europa_schijf(n)
+
+    t0 = time.perf_counter()
+    for _ in range(herhalingen):
+        exact = versnellingen(pos, massas)
+    t_direct = (time.perf_counter() - t0) / herhalingen
+    print(f"N = {len(pos)}: directe som {t_direct * 1e3:.1f} ms per evaluatie")
+
+    norm = np.linalg.norm(exact, axis=1)
+    resultaten = []
+    for theta in thetas:
+        t0 = time.perf_counter()
+        for _ in range(herhalingen):
+            benadering = versnellingen_boom(pos, massas, theta=theta)
+        t_boom = (time.perf_counter() - t0) / herhalingen
+        fout = np.linalg.norm(benadering - exact, axis=1) / norm
+        resultaten.append((theta, t_boom, np.sqrt(np.mean(fout**2)), np.max(fout)))
+        print(f"  theta = {theta:.2f}: {t_boom * 1e3:8.1f} ms, "
+              f"relatieve fout rms = {resultaten[-1][2]:.2e}, max = {resultaten[-1][3]:.2e}")
+    return t_direct, resultaten
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Barnes-Hut vs directe som op Io/Europa + deeltjesschijf")
+    parser.add_argument("--n", type=int, nargs="+", default=[1000, 4000])
+    parser.add_argument("--theta", type=float, nargs="+", default=[0.3, 0.5, 0.8])
+    args = parser.parse_args()
+    for n in args.n:
+        vergelijk(n, args.theta)
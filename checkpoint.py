@@ -0,0 +1,41 @@
+import json
+import os
+
+import numpy as np
+
+
+# Sla de volledige toestand van een run op als één .npz-bestand.
+# Arrays (posities, snelheden, ...) worden exact als float64 bewaard; alle andere
+# waarden (stapteller, omlooptellers, RNG-toestand, uitvoer-offsets) gaan als JSON mee.
+# Het bestand wordt eerst onder een tijdelijke naam geschreven en dan hernoemd,
+# zodat een crash tijdens het schrijven het vorige checkpoint niet beschadigt.
+def schrijf_checkpoint(pad, **toestand):
+    arrays = {k: v for k, v in toestand.items() if isinstance(v, np.ndarray)}
+    overig = {k: v for k, v in toestand.items() if not isinstance(v, np.ndarray)}
+    tijdelijk = pad + ".tmp"
+    with open(tijdelijk, "wb") as f:
+        np.savez(f, _overig=np.array(json.dumps(overig)), **arrays)
+    os.replace(tijdelijk, pad)
+
+
+# Lees een checkpoint terug als dict; geeft None als er (nog) geen checkpoint is
+def lees_checkpoint(pad):
+    if not os.path.exists(pad):
+        return None
+    with np.load(pad) as data:
+        toestand = json.loads(str(data["_overig"]))
+        for k in data.files:
+            if k != "_overig":
+                toestand[k] = data[k].copy()
+    return toestand
+
+
+# random.getstate() als JSON-vriendelijke lijst, en weer terug
+def rng_naar_json(state):
+    versie, interne_toestand, gauss = state
+    return [versie, list(interne_toestand), gauss]
+
+
+def rng_van_json(state):
+    versie, interne_toestand, gauss = state
+    return (versie, tuple(interne_toestand), gauss)
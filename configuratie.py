@@ -0,0 +1,106 @@
+import hashlib
+import json
+import math
+import os
+import random
+
+import numpy as np
+
+from nbody import G as G_STANDAARD, Lichaam, toestand
+
+# Map waarin de uitgerekende begintoestand per systeem wordt bewaard
+CACHE_MAP = ".cache"
+
+
+def lees_config(pad):
+    with open(pad) as f:
+        return json.load(f)
+
+
+# cos en sin van een hoek in graden; exact voor veelvouden van 90 graden
+def _cos_sin(graden):
+    if graden % 90 == 0:
+        kwart = int(graden // 90) % 4
+        return [(1.0, 0.0), (0.0, 1.0), (-1.0, 0.0), (0.0, -1.0)][kwart]
+    theta = math.radians(graden)
+    return math.cos(theta), math.sin(theta)
+
+
+# Beginpositie en -snelheid van een lichaam uit zijn baanelementen t.o.v. het centrum.
+#   start "apoapsis":   r = a(1 + e), v = v_circ * sqrt((1 - e) / (1 + e)) (zoals main4.py/gliese.py)
+#   start "periapsis":  r = a(1 - e), v = v_circ * sqrt((1 + e) / (1 - e))
+#   start "fase":       r = a(1 - e²) / (1 + e cos θ), v uit vis-viva (zoals main2.py)
+# 'hoek' is de richting van de straalvector in graden, of "random" (uniform, met de
+# seed uit de config); 'richting' +1 = tegen de klok in, -1 = met de klok mee.
+# De snelheid staat loodrecht op de straalvector, zoals in alle scripts.
+def begin_pos_vel(lichaam, M, G, rng):
+    if "pos" in lichaam:
+        return tuple(lichaam["pos"]), tuple(lichaam["vel"])
+
+    a, e = lichaam["a"], lichaam.get("e", 0.0)
+    hoek = lichaam.get("hoek", 0)
+    if hoek == "random":
+        theta = rng.uniform(0, 2 * math.pi)
+        c, s = math.cos(theta), math.sin(theta)
+    else:
+        c, s = _cos_sin(hoek)
+
+    start = lichaam.get("start", "apoapsis")
+    if start == "apoapsis":
+        r = a * (1 + e)
+        v = math.sqrt(G * M / a) * math.sqrt((1 - e) / (1 + e))
+    elif start == "periapsis":
+        r = a * (1 - e)
+        v = math.sqrt(G * M / a) * math.sqrt((1 + e) / (1 - e))
+    elif start == "fase":
+        r = a * (1 - e**2) / (1 + e * c)
+        v = math.sqrt(G * M * (2 / r - 1 / a))
+    else:
+        raise ValueError(f"{lichaam['naam']}: onbekende start {start!r}")
+    richting = lichaam.get("richting", 1)
+    return (r * c, r * s), (-richting * v * s, richting * v * c)
+
+
+# Bouw het systeem op uit een config: lichamen (centrum eerst), namen, massa's, pos, vel.
+# De uitgerekende begintoestand wordt bewaard in CACHE_MAP, met als sleutel alleen de
+# velden die hem bepalen (centrum, lichamen, G, seed), zodat een batch runs van hetzelfde
+# systeem hem maar één keer maakt, ook bij een andere dt, run-lengte of uitvoer.
+# Een "random" hoek zonder seed wordt niet bewaard: elke run moet dan een nieuwe trekking doen.
+def bouw_systeem(config, cache=True):
+    willekeurig = any(l.get("hoek") == "random" and "pos" not in l for l in config["lichamen"])
+    if willekeurig and config.get("seed") is None:
+        cache = False
+    bepalend = {veld: config.get(veld) for veld in ("centrum", "lichamen", "G", "seed")}
+    sleutel = hashlib.sha1(json.dumps(bepalend, sort_keys=True).encode()).hexdigest()[:16]
+    cache_pad = os.path.join(CACHE_MAP, f"{config.get('naam', 'systeem')}_{sleutel}.npz")
+    if cache and os.path.exists(cache_pad):
+        with np.load(cache_pad) as data:
+            return list(data["namen"]), data["massas"], data["pos"].copy(), data["vel"].copy()
+
+    G = config.get("G", G_STANDAARD)
+    rng = random.Random(config.get("seed"))
+    centrum = config["centrum"]
+    lichamen = [Lichaam(centrum["naam"], centrum["massa"],
+                        tuple(centrum.get("pos", (0.0, 0.0))), tuple(centrum.get("vel", (0.0, 0.0))))]
+    for l in config["lichamen"]:
+        pos, vel = begin_pos_vel(l, centrum["massa"], G, rng)
+        lichamen.append(Lichaam(l["naam"], l["massa"], pos, vel, l.get("test", False)))
+    namen, massas, pos, vel = toestand(lichamen)
+
+    # Eerst onder een tijdelijke naam (per proces) en dan hernoemen, zoals checkpoint.py:
+    # een parallelle run van hetzelfde systeem leest nooit een half geschreven bestand
+    if cache:
+        os.makedirs(CACHE_MAP, exist_ok=True)
+        tijdelijk = f"{cache_pad}.{os.getpid()}.tmp"
+        with open(tijdelijk, "wb") as f:
+            np.savez(f, namen=np.array(namen), massas=massas, pos=pos, vel=vel)
+        os.replace(tijdelijk, cache_pad)
+    return namen, massas, pos, vel
+
+
+# Kolomprefix per lichaam (veld "kolom", anders de naam) en de volgorde in de uitvoer
+def uitvoer_lichamen(config):
+    alle = [config["centrum"]] + config["lichamen"]
+    prefix = [l.get("kolom", l["naam"]) for l in alle]
+    volgorde = config.get("uitvoer", {}).get("volgorde", prefix)
+    return [prefix.index(p) for p in volgorde], volgorde
@@ -0,0 +1,99 @@
+import numpy as np
+
+from nbody import G, energie, impulsmoment
+from sampling import Ringbuffer
+from uitvoer import TrajectSchrijver
+
+
+# Fout die een run afbreekt als een behouden grootheid te ver is weggelopen
+class DriftTeGroot(RuntimeError):
+    def __init__(self, step, reden):
+        super().__init__(f"stap {step}: {reden}")
+        self.step = step
+        self.reden = reden
+
+
+# Behoudswetten tijdens de run: elke 'elke' stappen worden de relatieve energiefout, de
+# relatieve impulsmomentfout en de drift van het zwaartepunt (afwijking van eenparige
+# beweging, t.o.v. de grootte van het systeem) bepaald. Eén controle kost ongeveer één
+# krachtevaluatie (één keer alle onderlinge afstanden), dus de extra rekentijd is ~1/elke.
+# Boven een drempel wordt de run afgebroken (actie="stop", DriftTeGroot) of alleen
+# gemarkeerd (actie="markeer": één waarschuwing, reden in self.markering).
+# bij_stap en bij_blok hebben de vorm van de hooks van nbody.simuleer en
+# kernel.simuleer_snel; bij de kernel valt de controle op de blokgrenzen.
+class Diagnostiek:
+    KOLOMMEN = ["stap", "tijd", "energiefout", "impulsmomentfout", "zwaartepuntdrift"]
+
+    def __init__(self, pos, vel, massas, dt, elke=1000, max_energiefout=1e-3,
+                 max_impulsmomentfout=None, max_zwaartepuntdrift=None, actie="stop",
+                 geschiedenis=10000, G=G, start=0):
+        if actie not in ("stop", "markeer"):
+            raise ValueError(f"onbekende actie {actie!r}")
+        self.massas = np.asarray(massas, dtype=float)
+        self.dt = dt
+        self.elke = elke
+        self.G = G
+        self.drempels = {"energiefout": max_energiefout, "impulsmomentfout": max_impulsmomentfout,
+                         "zwaartepuntdrift": max_zwaartepuntdrift}
+        self.actie = actie
+        self.markering = None
+        self.laatste = None
+        self.geschiedenis = Ringbuffer(geschiedenis)
+        self._vorige = start
+
+        self.E0 = energie(pos, vel, self.massas, G)
+        self.L0 = impulsmoment(pos, vel, self.massas)
+        self.M = np.sum(self.massas)
+        self.R0 = self._zwaartepunt(pos)
+        self.V0 = self._zwaartepunt(vel)
+        self.t0 = start * dt
+        self.schaal = np.max(np.linalg.norm(pos - self.R0, axis=-1))
+
+    def _zwaartepunt(self, x):
+        return np.sum(self.massas[:, None] * x, axis=0) / self.M
+
+    # Meet de invarianten na 'stappen' afgeronde stappen en toets ze aan de drempels
+    def controleer(self, stappen, pos, vel):
+        t = stappen * self.dt
+        waarden = {
+            "energiefout": abs((energie(pos, vel, self.massas, self.G) - self.E0) / self.E0),
+            "impulsmomentfout": float(np.max(np.abs(impulsmoment(pos, vel, self.massas) - self.L0)
+                                             / np.maximum(np.abs(self.L0), 1e-300))),
+            "zwaartepuntdrift": float(np.linalg.norm(self._zwaartepunt(pos) - self.R0
+                                                     - self.V0 * (t - self.t0)) / self.schaal),
+        }
+        self.laatste = waarden
+        self.geschiedenis.voeg_toe(stappen, [t] + [waarden[k] for k in self.KOLOMMEN[2:]])
+
+        for naam, drempel in self.drempels.items():
+            if drempel is not None and waarden[naam] > drempel:
+                reden = f"{naam} {waarden[naam]:.2e} > {drempel:.0e} (t = {t / 86400:.1f} dagen)"
+                if self.actie == "stop":
+                    raise DriftTeGroot(stappen, reden)
+                if self.markering is None:
+                    self.markering = f"stap {stappen}: {reden}"
+                    print(f"⚠️ Behoudswet geschonden bij {self.markering}")
+        return waarden
+
+    def bij_stap(self, step, pos, vel):
+        if (step + 1) % self.elke == 0:
+            self.controleer(step + 1, pos, vel)
+
+    def bij_blok(self, eind, steps, pos_samples, vel_samples, pos, vel):
+        if eind // self.elke > self._vorige // self.elke:
+            self.controleer(eind, pos, vel)
+        self._vorige = eind
+
+    def rapport(self):
+        if self.laatste is None:
+            return "Diagnostiek: nog geen controle uitgevoerd"
+        tekst = ", ".join(f"{k} = {v:.2e}" for k, v in self.laatste.items())
+        return f"Diagnostiek: {tekst}" + (f" (⚠️ {self.markering})" if self.markering else "")
+
+    # Alle bewaarde controles (de laatste 'geschiedenis') als CSV
+    def naar_csv(self, pad):
+        steps, data = self.geschiedenis.inhoud()
+        with TrajectSchrijver(pad, self.KOLOMMEN, chunk=max(1, len(steps)),
+                              gehele_kolommen=["stap"]) as schrijver:
+            for step, rij in zip(steps.tolist(), data.tolist()):
+                schrijver.voeg_toe(step, *rij)
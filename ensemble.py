@@ -0,0 +1,170 @@
+import argparse
+import csv
+from collections import namedtuple
+
+import numpy as np
+
+from nbody import G, versnellingen
+from resonantie import Resonantie
+from diagnostiek import DriftTeGroot
+from telemetrie import Telemetrie, telemetrie_aan
+
+# Een maan in het ensemble: naam, massa (kg), halve lange as a (m) en excentriciteit e.
+# massa, a en e mogen een getal zijn of een array met één waarde per run.
+Maan = namedtuple("Maan", ["naam", "massa", "a", "e"])
+
+
+# Beginposities en -snelheden voor alle runs tegelijk, vorm (runs, 2).
+# "fase": willekeurige fase op de ellips, zoals init_pos_vel in main2.py/main3.py.
+# "perihelium": start op perihelium in een willekeurige richting, zoals random_pos_vel in main.py.
+def begin_pos_vel(a, e, M_mass, theta, start="fase"):
+    if start == "fase":
+        r = a * (1 - e**2) / (1 + e * np.cos(theta))
+    elif start == "perihelium":
+        r = a * (1 - e) * np.ones_like(theta)
+    else:
+        raise ValueError(f"Onbekende start: {start!r}")
+    v = np.sqrt(G * M_mass * (2 / r - 1 / a))
+    pos = np.stack([r * np.cos(theta), r * np.sin(theta)], axis=-1)
+    vel = np.stack([-v * np.sin(theta), v * np.cos(theta)], axis=-1)
+    return pos, vel
+
+
+# Versnellingen als elk lichaam alleen het centrale lichaam (index 0) voelt.
+# Het centrale lichaam zelf blijft stilstaan, zoals in main.py en main3.py.
+def versnellingen_centraal(pos, M_mass, G=G):
+    d = pos[..., 1:, :] - pos[..., :1, :]
+    r2 = np.einsum("...ik,...ik->...i", d, d)
+    acc = np.zeros_like(pos)
+    acc[..., 1:, :] = -G * M_mass * d / (r2 * np.sqrt(r2))[..., None]
+    return acc
+
+
+# Integreer 'runs' onafhankelijke realisaties tegelijk als één array (runs, lichamen, 2).
+# Elke run krijgt eigen random fases; massa, a en e van de manen mogen per run verschillen.
+# Geeft een tabel (dict met kolommen) terug met per run de fases, elementen,
+# omlopen (zoals tel_omlopen) en de omloopverhoudingen t.o.v. de eerste maan.
+# Bij twee of meer manen worden ook de 2:1-resonantiehoeken φ1, φ2 tussen de eerste
+# twee gevolgd (resonantie.py) en per run als librerend of circulerend geclassificeerd.
+# Met telemetrie="<naam>" is de voortgang live te volgen (telemetrie.py; de energiefout
+# is de grootste en de omloopverhouding de mediaan over de runs). Wordt het ensemble
+# daar gestopt, dan gaat de tabel over de stappen tot dan toe (kolom "stappen").
+def ensemble(M_mass, manen, runs, dt, stappen, onderling=True, start="fase",
+             elke=240, seed=None, telemetrie=None):
+    rng = np.random.default_rng(seed)
+
+    pos = np.zeros((runs, len(manen) + 1, 2))
+    vel = np.zeros_like(pos)
+    massas = np.full((runs, len(manen) + 1), M_mass, dtype=float)
+
+    tabel = {"run": np.arange(runs)}
+    for i, maan in enumerate(manen, start=1):
+        massas[:, i] = maan.massa
+        a = np.broadcast_to(np.asarray(maan.a, dtype=float), (runs,))
+        e = np.broadcast_to(np.asarray(maan.e, dtype=float), (runs,))
+        theta = rng.uniform(0, 2 * np.pi, runs)
+        pos[:, i], vel[:, i] = begin_pos_vel(a, e, M_mass, theta, start)
+        tabel[f"theta_{maan.naam}"] = theta
+        tabel[f"a_{maan.naam}"] = a
+        tabel[f"e_{maan.naam}"] = e
+        tabel[f"m_{maan.naam}"] = massas[:, i].copy()
+
+    # Omlopen tellen per sample: overgang van hoek < 0 naar hoek >= 0
+    omlopen = np.zeros((runs, len(manen)), dtype=np.int64)
+    vorige = None
+    resonantie = Resonantie(massas, 1, 2) if len(manen) >= 2 else None
+    live = Telemetrie(telemetrie, stappen, dt, massas, pos, vel, elke=10 * elke,
+                      actief=telemetrie is not None)
+
+    gedaan = stappen
+    with live:
+        try:
+            for step in range(stappen):
+                if onderling:
+                    acc = versnellingen(pos, massas)
+                else:
+                    acc = versnellingen_centraal(pos, M_mass)
+                vel += acc * dt
+                pos += vel * dt
+                live.bij_stap(step, pos, vel)
+
+                if step % elke == 0:
+                    d = pos[:, 1:] - pos[:, :1]
+                    theta = np.arctan2(d[..., 1], d[..., 0])
+                    if vorige is not None:
+                        omlopen += (vorige < 0) & (theta >= 0)
+                    vorige = theta
+                    if resonantie is not None:
+                        resonantie.neem(step * dt, pos, vel)
+        except DriftTeGroot as fout:
+            print(f"❌ Ensemble afgebroken bij {fout}")
+            gedaan = fout.step
+            live.sluit("afgebroken")
+
+    tabel["stappen"] = np.full(runs, gedaan)
+    for i, maan in enumerate(manen):
+        tabel[f"omlopen_{maan.naam}"] = omlopen[:, i]
+    eerste = manen[0].naam
+    for i, maan in enumerate(manen[1:], start=1):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            tabel[f"verhouding_{eerste}_{maan.naam}"] = omlopen[:, 0] / omlopen[:, i]
+    if resonantie is not None and len(resonantie.hoeken()[0]) >= 3:
+        for naam, l in zip(("phi1", "phi2"), resonantie.classificeer()):
+            tabel[f"librerend_{naam}"] = l.librerend
+            tabel[f"bepaald_{naam}"] = l.bepaald
+            tabel[f"amplitude_{naam}"] = l.amplitude
+            tabel[f"periode_{naam}"] = l.periode
+    return tabel
+
+
+# Schrijf een ensembletabel weg als CSV (één rij per run)
+def schrijf_tabel(tabel, pad):
+    kolommen = list(tabel)
+    with open(pad, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(kolommen)
+        for rij in zip(*(tabel[k] for k in kolommen)):
+            writer.writerow([x.item() if hasattr(x, "item") else x for x in rij])
+
+
+# Standaardopzet van de Io/Europa-experimenten
+M_JUPITER = 1.898e27
+IO = Maan("Io", 8.93e22, 4.22e8, 0.0041)
+EUROPA = Maan("Europa", 4.8e22, 6.71e8, 0.009)
+
+EXPERIMENTEN = {
+    "main": dict(onderling=False, start="perihelium"),   # main.py
+    "main2": dict(onderling=True, start="fase"),         # main2.py
+    "main3": dict(onderling=False, start="fase"),        # main3.py
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ensemble van Io/Europa-runs met willekeurige fases")
+    parser.add_argument("--experiment", choices=sorted(EXPERIMENTEN), default="main2")
+    parser.add_argument("--runs", type=int, default=1000)
+    parser.add_argument("--stappen", type=int, default=240000)
+    parser.add_argument("--dt", type=float, default=3600)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--uitvoer", default="ensemble.csv")
+    parser.add_argument("--telemetrie", action="store_true", help="live voortgang op localhost (zie telemetrie.py)")
+    args = parser.parse_args()
+
+    tabel = ensemble(M_JUPITER, [IO, EUROPA], args.runs, args.dt, args.stappen,
+                     seed=args.seed, telemetrie="ensemble" if telemetrie_aan() else None,
+                     **EXPERIMENTEN[args.experiment])
+    schrijf_tabel(tabel, args.uitvoer)
+
+    n_io, n_eu = tabel["omlopen_Io"], tabel["omlopen_Europa"]
+    resonant = np.sum(n_io == 2 * n_eu)
+    gedaan = int(tabel["stappen"][0])
+    if gedaan == args.stappen:
+        print(f"✅ {args.runs} runs voltooid ({args.experiment}), tabel opgeslagen in '{args.uitvoer}'.")
+    else:
+        print(f"⚠️ {args.runs} runs gestopt na {gedaan} van {args.stappen} stappen ({args.experiment}), "
+              f"tabel tot dan toe opgeslagen in '{args.uitvoer}'.")
+    print(f"➤ Precies 2:1 in {resonant} van de {args.runs} runs ({resonant / args.runs:.1%})")
+    if "librerend_phi1" in tabel:
+        print(f"➤ φ1 libreert in {np.sum(tabel['librerend_phi1'])} runs, "
+              f"φ2 in {np.sum(tabel['librerend_phi2'])} runs "
+              f"(onbepaald: {np.sum(~tabel['bepaald_phi1'])} en {np.sum(~tabel['bepaald_phi2'])})")
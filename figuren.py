@@ -0,0 +1,229 @@
+import argparse
+import csv
+import os
+import sys
+
+import numpy as np
+
+from uitvoer import Traject
+from laden import laad, lees_in_blokken
+
+
+# Headless: tijdens de run wordt matplotlib niet geïmporteerd en er komen geen vensters.
+# Aan te zetten met --headless op de command line of NBODY_HEADLESS=1 in de omgeving
+# (batch-nodes). De figuren worden achteraf gemaakt uit het opgeslagen traject:
+#   python figuren.py posities.csv --png banen.png
+def headless():
+    return "--headless" in sys.argv or os.environ.get("NBODY_HEADLESS", "0") not in ("", "0")
+
+
+# pyplot pas importeren als er echt geplot wordt; naar een bestand altijd via Agg,
+# dan is er geen scherm of GUI-toolkit nodig
+def pyplot(naar_bestand=False):
+    import matplotlib
+    if naar_bestand:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+# Toon de huidige figuur, of schrijf hem weg als 'bestand' gegeven is
+def toon(plt, bestand=None):
+    if bestand is None:
+        plt.show()
+    else:
+        plt.savefig(bestand, dpi=150)
+        plt.close()
+        print(f"✅ Figuur opgeslagen in '{bestand}'.")
+
+
+# Kolomnamen van een opgeslagen traject (CSV-bestand of binaire map, zie uitvoer.py)
+def kolommen_van(pad):
+    if os.path.isdir(pad):
+        return Traject(pad).kolommen
+    with open(pad, newline="") as f:
+        return next(csv.reader(f))
+
+
+# Lees de gevraagde kolommen van een opgeslagen traject als dict met arrays
+# (CSV via laden.py, dus met binaire cache: de tweede keer plotten parsed niets meer)
+def lees_kolommen(pad, kolommen):
+    tabel = laad(pad)
+    return {k: tabel.origineel(k) for k in kolommen}
+
+
+# Aantal rijen van een opgeslagen traject (zonder de kop bij CSV), zonder het te parsen.
+# Een laatste regel zonder afsluitende newline telt ook mee.
+def aantal_rijen(pad):
+    if os.path.isdir(pad):
+        return len(Traject(pad))
+    rijen, laatste = 0, b"\n"
+    with open(pad, "rb") as f:
+        while blok := f.read(1 << 24):
+            rijen += blok.count(b"\n")
+            laatste = blok[-1:]
+    if laatste != b"\n":
+        rijen += 1
+    return max(rijen - 1, 0)
+
+
+# Lees een opgeslagen traject in blokken van 'chunk' rijen (dict met arrays per blok),
+# zodat het geheugengebruik niet van de lengte van de run afhangt
+def lees_blokken(pad, kolommen, chunk=200_000):
+    return lees_in_blokken(pad, kolommen, chunk, canonieke_namen=False)
+
+
+# Min/max-omhullende van een tijdreeks: de rijen worden verdeeld over 'emmers' gelijke
+# groepen (ongeveer één per pixel) en per groep blijven alleen de begintijd, het minimum
+# en het maximum over. Pieken gaan dus niet verloren, en de figuur heeft altijd
+# 'emmers' punten, hoe lang de run ook was. NaN's (bv. een nog onbekende verhouding)
+# tellen niet mee.
+def omhullende(pad, tijdkolom, kolom, emmers=2000, chunk=200_000):
+    rijen = aantal_rijen(pad)
+    emmers = max(1, min(emmers, rijen))
+    tijd = np.full(emmers, np.nan)
+    laag = np.full(emmers, np.inf)
+    hoog = np.full(emmers, -np.inf)
+    begin = 0
+    for blok in lees_blokken(pad, [tijdkolom, kolom], chunk):
+        n = len(blok[kolom])
+        emmer = np.arange(begin, begin + n) * emmers // rijen
+        grenzen = np.flatnonzero(np.diff(emmer, prepend=-1))
+        e = emmer[grenzen]
+        laag[e] = np.fmin(laag[e], np.fmin.reduceat(blok[kolom], grenzen))
+        hoog[e] = np.fmax(hoog[e], np.fmax.reduceat(blok[kolom], grenzen))
+        tijd[e] = np.where(np.isnan(tijd[e]), blok[tijdkolom][grenzen], tijd[e])
+        begin += n
+    laag[np.isinf(laag)] = np.nan
+    hoog[np.isinf(hoog)] = np.nan
+    return tijd, laag, hoog
+
+
+# Dichtheidsraster van banen: per (x, y)-paar een 2D-histogram van pixels x pixels op een
+# gezamenlijk, vierkant bereik. Twee rondes door het bestand in blokken: eerst het bereik,
+# dan het tellen. Geeft (rasters per paar, extent) terug; raster[i, j] = x-bin i, y-bin j.
+def dichtheid(pad, paren, pixels=800, chunk=200_000):
+    kolommen = sorted({k for paar in paren for k in paar})
+    x_laag = y_laag = np.inf
+    x_hoog = y_hoog = -np.inf
+    for blok in lees_blokken(pad, kolommen, chunk):
+        for x, y in paren:
+            x_laag, x_hoog = min(x_laag, np.nanmin(blok[x])), max(x_hoog, np.nanmax(blok[x]))
+            y_laag, y_hoog = min(y_laag, np.nanmin(blok[y])), max(y_hoog, np.nanmax(blok[y]))
+
+    # Vierkant bereik (gelijke schaal op beide assen) met een kleine marge
+    midden_x, midden_y = (x_laag + x_hoog) / 2, (y_laag + y_hoog) / 2
+    half = max(x_hoog - x_laag, y_hoog - y_laag, 1e-300) / 2 * 1.02
+    extent = (midden_x - half, midden_x + half, midden_y - half, midden_y + half)
+
+    randen = (np.linspace(extent[0], extent[1], pixels + 1), np.linspace(extent[2], extent[3], pixels + 1))
+    rasters = {paar: np.zeros((pixels, pixels)) for paar in paren}
+    for blok in lees_blokken(pad, kolommen, chunk):
+        for x, y in paren:
+            rasters[(x, y)] += np.histogram2d(blok[x], blok[y], bins=randen)[0]
+    return rasters, extent
+
+
+# Paren (x, y) in een traject: "Io_x"/"Io_y", "iox"/"ioy", "Mx"/"My", ...
+def xy_paren(kolommen):
+    paren = []
+    for k in kolommen:
+        if k.endswith("x") and k[:-1] + "y" in kolommen:
+            paren.append((k, k[:-1] + "y", k[:-1].rstrip("_")))
+    return paren
+
+
+# Baanplot uit een opgeslagen traject.
+# banen: lijst (x-kolom, y-kolom, label, kleur, stijl); stijl "o" tekent alleen punten
+# (voor het centrale lichaam). 'punten' zijn vaste markeringen (x, y, label, kleur), bv.
+# een centraal lichaam dat stilstaat en dus geen kolommen heeft.
+# Zonder 'bestand' verschijnt de figuur op het scherm.
+# Tot 'max_punten' rijen worden de banen als lijnen getekend; daarboven (of met
+# modus="dichtheid") als dichtheidsraster, zodat de rekentijd en de figuur niet meer
+# van de lengte van de run afhangen.
+def baanplot(pad, banen, titel, bestand=None, eenheid="meter", modus="auto",
+             max_punten=100_000, pixels=800, punten=()):
+    plt = pyplot(bestand is not None)
+    if modus == "auto":
+        modus = "lijn" if aantal_rijen(pad) <= max_punten else "dichtheid"
+
+    plt.figure(figsize=(10, 10))
+    if modus == "dichtheid":
+        from matplotlib.colors import to_rgb
+        rasters, extent = dichtheid(pad, [baan[:2] for baan in banen], pixels)
+        # Elk lichaam een laag in zijn eigen kleur; dekking ~ log(aantal samples per pixel)
+        beeld = np.ones((pixels, pixels, 3))
+        for x, y, label, kleur, stijl in banen:
+            h = rasters[(x, y)].T
+            alfa = np.where(h > 0, 0.25 + 0.75 * np.log1p(h) / np.log1p(max(h.max(), 1)), 0.0)[..., None]
+            beeld = beeld * (1 - alfa) + np.array(to_rgb(kleur)) * alfa
+            plt.plot([], [], "o" if stijl == "o" else "-", label=label, color=kleur)
+        plt.imshow(beeld, origin="lower", extent=extent, interpolation="nearest")
+    else:
+        data = lees_kolommen(pad, [k for baan in banen for k in baan[:2]])
+        for x, y, label, kleur, stijl in banen:
+            if stijl == "o":
+                plt.plot(data[x], data[y], "o", label=label, color=kleur, markersize=3)
+            else:
+                plt.plot(data[x], data[y], stijl, label=label, color=kleur)
+    for x, y, label, kleur in punten:
+        plt.plot([x], [y], "o", color=kleur, markersize=6, label=label)
+    plt.xlabel(f"x ({eenheid})")
+    plt.ylabel(f"y ({eenheid})")
+    plt.title(titel)
+    plt.axis("equal")
+    plt.grid(True)
+    plt.legend()
+    plt.tight_layout()
+    toon(plt, bestand)
+
+
+# Eén kolom uit een opgeslagen traject tegen de tijd, met optioneel horizontale
+# referentielijnen als (waarde, label). Boven 'emmers' rijen wordt de min/max-omhullende
+# getekend in plaats van elke sample.
+def tijdreeksplot(pad, tijdkolom, kolom, titel, bestand=None, label=None, kleur="purple",
+                  xlabel=None, ylabel=None, lijnen=(), emmers=2000):
+    plt = pyplot(bestand is not None)
+
+    plt.figure(figsize=(10, 5))
+    if aantal_rijen(pad) > emmers:
+        tijd, laag, hoog = omhullende(pad, tijdkolom, kolom, emmers)
+        plt.fill_between(tijd, laag, hoog, step="post", color=kleur, linewidth=0.5,
+                         label=label or kolom)
+    else:
+        data = lees_kolommen(pad, [tijdkolom, kolom])
+        plt.plot(data[tijdkolom], data[kolom], label=label or kolom, color=kleur)
+    for waarde, lijnlabel in lijnen:
+        plt.axhline(waarde, color="gray", linestyle="--", label=lijnlabel)
+    plt.xlabel(xlabel or tijdkolom)
+    plt.ylabel(ylabel or kolom)
+    plt.title(titel)
+    plt.grid(True)
+    plt.legend()
+    plt.tight_layout()
+    toon(plt, bestand)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maak figuren uit een opgeslagen traject (CSV of binaire map)")
+    parser.add_argument("traject")
+    parser.add_argument("--png", help="uitvoerbestand; zonder deze optie verschijnt een venster")
+    parser.add_argument("--tijd", help="tijdkolom voor een tijdreeksplot (standaard: eerste kolom)")
+    parser.add_argument("--kolom", help="tijdreeksplot van deze kolom in plaats van een baanplot")
+    parser.add_argument("--titel", default=None)
+    parser.add_argument("--modus", choices=["auto", "lijn", "dichtheid"], default="auto",
+                        help="baanplot als lijnen of als dichtheidsraster (auto: op basis van het aantal rijen)")
+    parser.add_argument("--pixels", type=int, default=800, help="resolutie van het dichtheidsraster")
+    parser.add_argument("--emmers", type=int, default=2000, help="punten in de omhullende van een tijdreeks")
+    args = parser.parse_args()
+
+    kolommen = kolommen_van(args.traject)
+    if args.kolom:
+        tijdreeksplot(args.traject, args.tijd or kolommen[0], args.kolom,
+                      args.titel or args.kolom, args.png, emmers=args.emmers)
+    else:
+        kleuren = ["blue", "green", "orange", "red", "purple", "brown", "gray"]
+        banen = [(x, y, label, kleuren[i % len(kleuren)], "-")
+                 for i, (x, y, label) in enumerate(xy_paren(kolommen))]
+        baanplot(args.traject, banen, args.titel or os.path.basename(args.traject), args.png,
+                 modus=args.modus, pixels=args.pixels)
@@ -0,0 +1,221 @@
+import numpy as np
+
+from boomcode import stap_leapfrog_boom
+from kepler import kepler_drift
+from nbody import G, versnellingen, energie, simuleer, stap as stap_euler
+
+# Alle stapfuncties hebben de vorm stap(pos, vel, massas, dt, G): ze werken pos en vel
+# ter plekke bij en geven het aantal krachtevaluaties van die stap terug.
+
+
+# Leapfrog (drift-kick-drift); symplectisch, 2e orde, gelijkwaardig aan velocity-Verlet
+def stap_leapfrog(pos, vel, massas, dt, G=G):
+    pos += vel * (dt / 2)
+    vel += versnellingen(pos, massas, G) * dt
+    pos += vel * (dt / 2)
+    return 1
+
+
+# Coëfficiënten van Yoshida (1990) voor een symplectische integrator van 4e orde
+_W1 = 1 / (2 - 2 ** (1 / 3))
+_W0 = -(2 ** (1 / 3)) * _W1
+_YOSHIDA_C = (_W1 / 2, (_W0 + _W1) / 2, (_W0 + _W1) / 2, _W1 / 2)
+_YOSHIDA_D = (_W1, _W0, _W1)
+
+
+# Yoshida 4e orde: drie leapfrog-deelstappen met afgestemde lengtes
+def stap_yoshida4(pos, vel, massas, dt, G=G):
+    for c, d in zip(_YOSHIDA_C, _YOSHIDA_D):
+        pos += vel * (c * dt)
+        vel += versnellingen(pos, massas, G) * (d * dt)
+    pos += vel * (_YOSHIDA_C[3] * dt)
+    return 3
+
+
+# Butcher-tableau van Dormand-Prince 5(4)
+_DP_C = (0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1, 1)
+_DP_A = (
+    (),
+    (1 / 5,),
+    (3 / 40, 9 / 40),
+    (44 / 45, -56 / 15, 32 / 9),
+    (19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729),
+    (9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656),
+    (35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84),
+)
+_DP_B5 = (35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84, 0)
+_DP_B4 = (5179 / 57600, 0, 7571 / 16695, 393 / 640, -92097 / 339200, 187 / 2100, 1 / 40)
+
+
+# RK45 (Dormand-Prince) met adaptieve stapgrootte binnen het interval dt.
+# De deelstap wordt zo gekozen dat de lokale fout per deelstap onder 'tol' blijft
+# (relatief t.o.v. de grootte van posities en snelheden).
+def stap_rk45(pos, vel, massas, dt, G=G, tol=1e-10):
+    evaluaties = 0
+    t = 0.0
+    h = dt
+    while t < dt:
+        h = min(h, dt - t)
+        kx, kv = [], []
+        for i in range(7):
+            x = pos + h * sum(a * k for a, k in zip(_DP_A[i], kx)) if i else pos
+            v = vel + h * sum(a * k for a, k in zip(_DP_A[i], kv)) if i else vel
+            kx.append(v)
+            kv.append(versnellingen(x, massas, G))
+        evaluaties += 7
+
+        x5 = pos + h * sum(b * k for b, k in zip(_DP_B5, kx))
+        v5 = vel + h * sum(b * k for b, k in zip(_DP_B5, kv))
+        x4 = pos + h * sum(b * k for b, k in zip(_DP_B4, kx))
+        v4 = vel + h * sum(b * k for b, k in zip(_DP_B4, kv))
+
+        schaal_x = tol * (np.abs(pos) + np.max(np.abs(pos)))
+        schaal_v = tol * (np.abs(vel) + np.max(np.abs(vel)))
+        fout = max(np.max(np.abs(x5 - x4) / schaal_x), np.max(np.abs(v5 - v4) / schaal_v))
+
+        if fout <= 1:
+            pos[...] = x5
+            vel[...] = v5
+            t += h
+        h *= min(5.0, max(0.2, 0.9 * fout ** -0.2)) if fout > 0 else 5.0
+    return evaluaties
+
+
+# Wisdom-Holman-afbeelding in democratisch-heliocentrische coördinaten
+# (Duncan, Levison & Lee 1998). Lichaam 0 is het centrale lichaam (Jupiter, de ster);
+# de Keplerbeweging om dat lichaam wordt exact opgelost, alleen de onderlinge
+# storingen tussen de overige lichamen worden als kicks meegenomen.
+def stap_wisdom_holman(pos, vel, massas, dt, G=G):
+    m0 = massas[0]
+    mtot = np.sum(massas)
+    zwaartepunt = np.sum(massas[:, None] * pos, axis=0) / mtot
+    v_zwaartepunt = np.sum(massas[:, None] * vel, axis=0) / mtot
+
+    q = pos[1:] - pos[0]            # heliocentrische posities
+    p = vel[1:] - v_zwaartepunt     # barycentrische snelheden
+    m = massas[1:]
+
+    def kick(h):
+        p[...] += versnellingen(q, m, G) * h
+
+    def zon_drift(h):
+        q[...] += np.sum(m[:, None] * p, axis=0) / m0 * h
+
+    kick(dt / 2)
+    zon_drift(dt / 2)
+    q[...], p[...] = kepler_drift(q, p, G * m0, dt)
+    zon_drift(dt / 2)
+    kick(dt / 2)
+
+    # Terug naar gewone (inertiële) coördinaten
+    zwaartepunt = zwaartepunt + v_zwaartepunt * dt
+    pos[0] = zwaartepunt - np.sum(m[:, None] * q, axis=0) / mtot
+    pos[1:] = q + pos[0]
+    vel[0] = v_zwaartepunt - np.sum(m[:, None] * p, axis=0) / m0
+    vel[1:] = p + v_zwaartepunt
+    return 2
+
+
+INTEGRATOREN = {
+    "euler": stap_euler,
+    "leapfrog": stap_leapfrog,
+    "yoshida4": stap_yoshida4,
+    "rk45": stap_rk45,
+    "wisdom_holman": stap_wisdom_holman,
+    "leapfrog_boom": stap_leapfrog_boom,   # Barnes-Hut-krachten, optie theta (zie boomcode.py)
+}
+
+
+# Integreer met een gekozen integrator en houd de energiefout bij.
+# De energie wordt elke 'elke_energie' stappen bepaald; het rapport bevat
+# begin- en eindenergie, de grootste en laatste relatieve fout en het aantal krachtevaluaties.
+def integreer(pos, vel, massas, dt, stappen, methode="leapfrog", bij_stap=None,
+              elke_energie=None, G=G):
+    stapfunctie = INTEGRATOREN[methode]
+    elke_energie = elke_energie or max(1, stappen // 1000)
+    E0 = energie(pos, vel, massas, G)
+    rapport = {"methode": methode, "stappen": stappen, "dt": dt, "krachtevaluaties": 0,
+               "E0": E0, "E_eind": E0, "max_rel_fout": 0.0, "rel_fout": 0.0}
+
+    def tel_stap(pos, vel, massas, dt, G):
+        rapport["krachtevaluaties"] += stapfunctie(pos, vel, massas, dt, G)
+
+    def controle(step, pos, vel):
+        if (step + 1) % elke_energie == 0 or step == stappen - 1:
+            E = energie(pos, vel, massas, G)
+            fout = abs((E - E0) / E0)
+            rapport["E_eind"] = E
+            rapport["rel_fout"] = fout
+            rapport["max_rel_fout"] = max(rapport["max_rel_fout"], fout)
+        if bij_stap is not None:
+            bij_stap(step, pos, vel)
+
+    simuleer(pos, vel, massas, dt, stappen, controle, G, stapfunctie=tel_stap)
+    return rapport
+
+
+# Rapport als leesbare regel
+def rapport_tekst(rapport):
+    return (f"{rapport['methode']:>14}: dt = {rapport['dt']:g} s, {rapport['stappen']} stappen, "
+            f"{rapport['krachtevaluaties']} krachtevaluaties, "
+            f"|dE/E| eind = {rapport['rel_fout']:.2e}, max = {rapport['max_rel_fout']:.2e}")
+
+
+# Tijdstap op basis van de huidige toestand, geschaald met de nauwkeurigheidsparameter eta.
+# "afstand": kleinste van r/|v| en de vrije-valtijd sqrt(r^3 / G(m_i + m_j)) over alle paren,
+#            zodat dt vanzelf krimpt bij een nadering tot het dichtstbijzijnde lichaam.
+# "jerk":    Aarseth-achtig criterium min_i |a_i| / |da_i/dt|.
+def tijdstap(pos, vel, massas, eta, criterium="afstand", G=G):
+    n = pos.shape[-2]
+    d = pos[None, :, :] - pos[:, None, :]
+    dv = vel[None, :, :] - vel[:, None, :]
+    r2 = np.einsum("ijk,ijk->ij", d, d)
+    idx = np.arange(n)
+    r2[idx, idx] = np.inf
+
+    if criterium == "afstand":
+        v2 = np.einsum("ijk,ijk->ij", dv, dv)
+        v2[idx, idx] = 0
+        mu = G * (massas[:, None] + massas[None, :])
+        kruistijd = np.sqrt(r2 / np.maximum(v2, 1e-300))
+        valtijd = np.sqrt(r2 * np.sqrt(r2) / mu)
+        return eta * min(np.min(kruistijd), np.min(valtijd))
+
+    if criterium == "jerk":
+        r3 = r2 * np.sqrt(r2)
+        rv = np.einsum("ijk,ijk->ij", d, dv)
+        acc = np.einsum("ij,ijk->ik", G * massas[None, :] / r3, d)
+        jerk = np.einsum("ij,ijk->ik", G * massas[None, :] / r3, dv) \
+            - np.einsum("ij,ijk->ik", 3 * G * massas[None, :] * rv / (r3 * r2), d)
+        a = np.sqrt(np.sum(acc * acc, axis=-1))
+        j = np.sqrt(np.sum(jerk * jerk, axis=-1))
+        return eta * np.min(a / np.maximum(j, 1e-300))
+
+    raise ValueError(f"Onbekend tijdstapcriterium: {criterium!r}")
+
+
+# Integreer tot t_eind met een per stap aangepaste dt (begrensd door dt_min en dt_max).
+# bij_stap(step, t, pos, vel) wordt na elke stap aangeroepen.
+# Geeft de dt-geschiedenis terug als array met kolommen (t, dt), zodat achteraf
+# te zien is waar de rekentijd naartoe ging (bv. rond het periastron van Gliese 876 c).
+# 'stapfunctie' vervangt INTEGRATOREN[methode] (bv. met vaste opties, zoals in run.py).
+# Een meegegeven lijst 'geschiedenis' wordt ter plekke aangevuld: breekt bij_stap de run
+# af (DriftTeGroot), dan heeft de aanroeper de (t, dt) van de stappen tot dan toe.
+def integreer_adaptief(pos, vel, massas, t_eind, methode="leapfrog", eta=0.01,
+                       criterium="afstand", dt_min=0.0, dt_max=np.inf, bij_stap=None, G=G,
+                       stapfunctie=None, geschiedenis=None):
+    if stapfunctie is None:
+        stapfunctie = INTEGRATOREN[methode]
+    if geschiedenis is None:
+        geschiedenis = []
+    t = 0.0
+    step = 0
+    while t < t_eind:
+        dt = min(max(tijdstap(pos, vel, massas, eta, criterium, G), dt_min), dt_max, t_eind - t)
+        stapfunctie(pos, vel, massas, dt, G)
+        t += dt
+        geschiedenis.append((t, dt))
+        if bij_stap is not None:
+            bij_stap(step, t, pos, vel)
+        step += 1
+    return np.array(geschiedenis).reshape(-1, 2)
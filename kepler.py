@@ -0,0 +1,79 @@
+import numpy as np
+
+
+# Laat lichamen over een tijd dt langs hun Keplerbaan om een centrale massa bewegen
+# (f- en g-functies, excentrische-anomalie-formulering, alleen gebonden banen).
+# pos, vel: (..., D) relatief t.o.v. het centrale lichaam; mu = G * M.
+def kepler_drift(pos, vel, mu, dt, tol=1e-14, max_iter=50):
+    r0 = np.sqrt(np.sum(pos * pos, axis=-1))
+    v2 = np.sum(vel * vel, axis=-1)
+    alpha = 2 / r0 - v2 / mu                 # 1 / a
+    if np.any(alpha <= 0):
+        raise ValueError("kepler_drift: ongebonden baan (e >= 1) wordt niet ondersteund")
+    a = 1 / alpha
+    n = np.sqrt(mu * alpha**3)
+    ec = 1 - r0 * alpha                      # e cos E0
+    es = np.sum(pos * vel, axis=-1) / np.sqrt(mu * a)   # e sin E0
+
+    # Los de Keplervergelijking op voor dE met Newton-Raphson
+    dM = n * dt
+    x = np.array(dM, dtype=float)
+    for _ in range(max_iter):
+        s, c = np.sin(x), np.cos(x)
+        F = x - ec * s + es * (1 - c) - dM
+        dF = 1 - ec * c + es * s
+        stap = F / dF
+        x = x - stap
+        if np.all(np.abs(stap) <= tol * (1 + np.abs(x))):
+            break
+
+    s, c = np.sin(x), np.cos(x)
+    r = a * (1 - ec * c + es * s)
+    f = 1 - a / r0 * (1 - c)
+    g = dt - (x - s) / n
+    fdot = -np.sqrt(mu * a) / (r * r0) * s
+    gdot = 1 - a / r * (1 - c)
+
+    nieuw_pos = f[..., None] * pos + g[..., None] * vel
+    nieuw_vel = fdot[..., None] * pos + gdot[..., None] * vel
+    return nieuw_pos, nieuw_vel
+
+
+# Analytische tweelichamenbaan: posities en snelheden op willekeurige tijden in één keer,
+# zonder tussenstappen. pos0, vel0: (..., D) t.o.v. het centrale lichaam op t = 0,
+# mu een getal of één waarde per lichaam, tijden: (T,). Geeft arrays (T, ..., D) terug.
+# De tijden worden per lichaam eerst modulo de omlooptijd genomen, zodat een sprong
+# over duizenden omlopen net zo nauwkeurig is als een sprong binnen de eerste omloop.
+def kepler_baan(pos0, vel0, mu, tijden):
+    pos0 = np.asarray(pos0, dtype=float)
+    vel0 = np.asarray(vel0, dtype=float)
+    tijden = np.asarray(tijden, dtype=float).reshape((-1,) + (1,) * (pos0.ndim - 1))
+    alpha = 2 / np.sqrt(np.sum(pos0 * pos0, axis=-1)) - np.sum(vel0 * vel0, axis=-1) / mu
+    if np.any(alpha <= 0):
+        raise ValueError("kepler_baan: ongebonden baan (e >= 1) wordt niet ondersteund")
+    periode = 2 * np.pi / np.sqrt(mu * alpha**3)
+    return kepler_drift(pos0, vel0, mu, np.mod(tijden, periode))
+
+
+# Osculerende baanelementen (2D) uit positie en snelheid t.o.v. het centrale lichaam.
+# Geeft a, e, ϖ (lengte van het periapsis) en λ (gemiddelde lengte) terug, in radialen.
+# Werkt gevectoriseerd over alle voorloop-dimensies van pos en vel (..., 2).
+def elementen(pos, vel, mu):
+    x, y = pos[..., 0], pos[..., 1]
+    vx, vy = vel[..., 0], vel[..., 1]
+    r = np.hypot(x, y)
+    v2 = vx * vx + vy * vy
+    rv = x * vx + y * vy
+
+    a = 1 / (2 / r - v2 / mu)
+    ex = ((v2 - mu / r) * x - rv * vx) / mu
+    ey = ((v2 - mu / r) * y - rv * vy) / mu
+    e = np.hypot(ex, ey)
+    varpi = np.arctan2(ey, ex)
+
+    # Ware anomalie -> excentrische -> gemiddelde anomalie
+    f = np.arctan2(y, x) - varpi
+    E = 2 * np.arctan2(np.sqrt(1 - e) * np.sin(f / 2), np.sqrt(1 + e) * np.cos(f / 2))
+    M = E - e * np.sin(E)
+    lam = np.mod(varpi + M, 2 * np.pi)
+    return a, e, varpi, lam
@@ -0,0 +1,199 @@
+import math
+
+import numpy as np
+
+from nbody import G
+
+# Optioneel: met numba worden de blokfuncties hieronder gecompileerd.
+# Zonder numba draaien precies dezelfde functies als gewone Python op lijsten met floats.
+try:
+    from numba import njit
+    NUMBA = True
+except ImportError:
+    NUMBA = False
+
+# Integratoren waarvoor een snelle blokfunctie bestaat
+KERNEL_METHODEN = ("euler", "leapfrog")
+
+
+# Exact product x * y = hi + lo (Dekker, met de splitsing van Veltkamp)
+def _product(x, y):
+    t = x * 134217729.0
+    xh = t - (t - x)
+    xl = x - xh
+    t = y * 134217729.0
+    yh = t - (t - y)
+    yl = y - yh
+    p = xh * yh
+    q = xh * yl + xl * yh
+    hi = p + q
+    return hi, p - hi + q + xl * yl
+
+
+# math.hypot zoals CPython hem berekent (correct afgerond, met een correctiestap);
+# de hypot uit libm die numba gebruikt wijkt soms in de laatste bit af
+def _hypot(x, y):
+    x, y = abs(x), abs(y)
+    grootste = max(x, y)
+    if grootste == 0.0:
+        return grootste
+    schaal = math.ldexp(1.0, -math.frexp(grootste)[1])
+    som, frac1, frac2 = 1.0, 0.0, 0.0
+    for w in (x * schaal, y * schaal):
+        hi, lo = _product(w, w)
+        nieuw = som + hi
+        frac2 += (som - nieuw) + hi
+        som = nieuw
+        frac1 += lo
+    h = math.sqrt(som - 1.0 + (frac1 + frac2))
+    hi, lo = _product(-h, h)
+    nieuw = som + hi
+    frac2 += (som - nieuw) + hi
+    som = nieuw
+    frac1 += lo
+    h += (som - 1.0 + (frac1 + frac2)) / (2.0 * h)
+    return h / schaal
+
+
+# Versnellingen (2D) van alle lichamen in ax, ay, paar voor paar.
+# 'massief' en 'test' zijn de indices van de lichamen met en zonder massa: alleen paren
+# met een massief lichaam worden bekeken, zodat testdeeltjes O(N_massief * N) kosten.
+# Massieve paren gaan in dezelfde volgorde van bewerkingen als de oorspronkelijke scripts
+# (kracht G m_i m_j / r², ontbonden met dx / r, opgeteld per lichaam en dan gedeeld door
+# de massa), zodat main4.py en gliese.py hun oude uitvoer bit voor bit reproduceren.
+# 'twee' is de exponent in r**2, als argument doorgegeven: bij een constante maakt numba
+# er r*r van, terwijl Python pow() uit libm aanroept, en dat verschilt soms een bit.
+def _versnellingen(x, y, m, G, massief, test, twee, ax, ay):
+    for i in range(len(x)):
+        ax[i] = 0.0
+        ay[i] = 0.0
+    for a in range(len(massief)):
+        i = massief[a]
+        for b in range(a + 1, len(massief)):
+            j = massief[b]
+            dx = x[j] - x[i]
+            dy = y[j] - y[i]
+            r = _hypot(dx, dy)
+            F = G * m[i] * m[j] / r**twee
+            Fx = F * dx / r
+            Fy = F * dy / r
+            ax[i] += Fx
+            ay[i] += Fy
+            ax[j] -= Fx
+            ay[j] -= Fy
+    for i in massief:
+        ax[i] /= m[i]
+        ay[i] /= m[i]
+    for i in test:
+        for j in massief:
+            dx = x[j] - x[i]
+            dy = y[j] - y[i]
+            r2 = dx * dx + dy * dy
+            inv_r3 = 1.0 / (r2 * math.sqrt(r2))
+            ax[i] += G * m[j] * dx * inv_r3
+            ay[i] += G * m[j] * dy * inv_r3
+
+
+# Een blok stappen semi-impliciete Euler. Na stap k wordt de toestand bewaard in
+# uit_pos/uit_vel als bewaar[k] waar is; de volgende vrije rij staat in 'rij'.
+def _euler_blok(x, y, vx, vy, m, G, dt, bewaar, massief, test, twee, ax, ay, uit_pos, uit_vel):
+    n = len(x)
+    rij = 0
+    for k in range(len(bewaar)):
+        _versnellingen(x, y, m, G, massief, test, twee, ax, ay)
+        for i in range(n):
+            vx[i] += ax[i] * dt
+            vy[i] += ay[i] * dt
+            x[i] += vx[i] * dt
+            y[i] += vy[i] * dt
+        if bewaar[k]:
+            for i in range(n):
+                uit_pos[rij, i, 0] = x[i]
+                uit_pos[rij, i, 1] = y[i]
+                uit_vel[rij, i, 0] = vx[i]
+                uit_vel[rij, i, 1] = vy[i]
+            rij += 1
+
+
+# Een blok stappen leapfrog (drift-kick-drift), zelfde opzet als _euler_blok
+def _leapfrog_blok(x, y, vx, vy, m, G, dt, bewaar, massief, test, twee, ax, ay, uit_pos, uit_vel):
+    n = len(x)
+    rij = 0
+    for k in range(len(bewaar)):
+        for i in range(n):
+            x[i] += vx[i] * dt / 2
+            y[i] += vy[i] * dt / 2
+        _versnellingen(x, y, m, G, massief, test, twee, ax, ay)
+        for i in range(n):
+            vx[i] += ax[i] * dt
+            vy[i] += ay[i] * dt
+            x[i] += vx[i] * dt / 2
+            y[i] += vy[i] * dt / 2
+        if bewaar[k]:
+            for i in range(n):
+                uit_pos[rij, i, 0] = x[i]
+                uit_pos[rij, i, 1] = y[i]
+                uit_vel[rij, i, 0] = vx[i]
+                uit_vel[rij, i, 1] = vy[i]
+            rij += 1
+
+
+if NUMBA:
+    _product = njit(cache=True)(_product)
+    _hypot = njit(cache=True)(_hypot)
+    _versnellingen = njit(cache=True)(_versnellingen)
+    _euler_blok = njit(cache=True)(_euler_blok)
+    _leapfrog_blok = njit(cache=True)(_leapfrog_blok)
+
+else:
+    _hypot = math.hypot
+
+_BLOKFUNCTIES = {"euler": _euler_blok, "leapfrog": _leapfrog_blok}
+
+
+# Integreer 'stappen - start' stappen in blokken van 'blok' stappen per aanroep van de kernel.
+# bewaar(steps) krijgt een array met stapnummers en geeft per stap aan of die bewaard
+# moet worden (bv. lambda s: s % 240 == 0). Na elk blok wordt
+# bij_blok(eind, steps, pos_samples, vel_samples, pos, vel) aangeroepen met het aantal
+# afgeronde stappen 'eind' en alleen de bewaarde stappen; pos en vel zijn dan de
+# toestand aan het eind van het blok.
+# Blokgrenzen vallen op veelvouden van 'blok', zodat checkpoints daar kunnen aansluiten.
+def simuleer_snel(pos, vel, massas, dt, stappen, bewaar, bij_blok=None, blok=10000,
+                  methode="euler", start=0, G=G):
+    if pos.shape[-1] != 2:
+        raise ValueError("simuleer_snel ondersteunt alleen 2D-systemen")
+    blokfunctie = _BLOKFUNCTIES[methode]
+    n = len(massas)
+    massief = np.flatnonzero(np.asarray(massas) != 0)
+    test = np.flatnonzero(np.asarray(massas) == 0)
+
+    if NUMBA:
+        x, y = pos[:, 0].copy(), pos[:, 1].copy()
+        vx, vy = vel[:, 0].copy(), vel[:, 1].copy()
+        m = np.asarray(massas, dtype=float)
+        ax, ay = np.zeros(n), np.zeros(n)
+    else:
+        massief, test = massief.tolist(), test.tolist()
+        x, y = pos[:, 0].tolist(), pos[:, 1].tolist()
+        vx, vy = vel[:, 0].tolist(), vel[:, 1].tolist()
+        m = [float(mi) for mi in massas]
+        ax, ay = [0.0] * n, [0.0] * n
+
+    b0 = start
+    while b0 < stappen:
+        b1 = min((b0 // blok + 1) * blok, stappen)
+        steps = np.arange(b0, b1)
+        masker = np.ones(len(steps), dtype=np.bool_) & bewaar(steps)
+        aantal = int(np.count_nonzero(masker))
+        uit_pos = np.empty((aantal, n, 2))
+        uit_vel = np.empty((aantal, n, 2))
+
+        blokfunctie(x, y, vx, vy, m, float(G), float(dt),
+                    masker if NUMBA else masker.tolist(), massief, test, 2.0, ax, ay, uit_pos, uit_vel)
+
+        pos[:, 0], pos[:, 1] = x, y
+        vel[:, 0], vel[:, 1] = vx, vy
+        if bij_blok is not None:
+            bij_blok(b1, steps[masker], uit_pos, uit_vel, pos, vel)
+        b0 = b1
+    return pos, vel
@@ -0,0 +1,217 @@
+import itertools
+import os
+import re
+import shutil
+
+import numpy as np
+
+from uitvoer import BinaireTrajectSchrijver, Traject
+
+
+# Snel laden van de opgeslagen CSV-bestanden (posities.csv, posities_io_europa.csv,
+# posities_gliese876_bc.csv, x_snelheden_gliese876.csv, ...).
+#  - De koppen verschillen per script (dag/uur, iox/Io_x, c_x/vx_c); laden brengt ze
+#    onder één naamgeving: "tijd" en <lichaam>_<component>, bv. io_x, europa_y, c_vx.
+#  - Het CSV-bestand wordt in blokken met np.loadtxt geparsed (niet rij voor rij) en
+#    daarna als binair kolomtraject (zie uitvoer.py) naast het bestand bewaard, in
+#    .cache/<bestand>.traject. Die cache is geldig zolang grootte en mtime van de CSV
+#    gelijk zijn; een volgende keer laden is dan alleen een memory-map.
+# Voorbeeld:
+#   tabel = laad("posities.csv")
+#   tabel["io_x"], tabel["tijd"], tabel.tijdeenheid    # -> array, array, "dag"
+
+TIJDKOLOMMEN = ("dag", "uur", "stap", "tijd")
+# Namen zonder scheidingsteken (iox, eux, Mx uit main.py) alleen voor bekende afkortingen
+KORTE_NAMEN = {"io": "io", "eu": "europa", "m": "jupiter"}
+
+_COMPONENT = r"(v?[xyz])"
+_PATRONEN = [
+    re.compile(rf"^{_COMPONENT}_(\w+)$"),      # vx_c, x_ster  -> (component, lichaam)
+    re.compile(rf"^(\w+)_{_COMPONENT}$"),      # Io_x, ster_vy -> (lichaam, component)
+    re.compile(rf"^([a-z]+?){_COMPONENT}$"),   # iox, Mx, euvy -> (afkorting, component)
+]
+
+
+# Canonieke naam van één kolom; kolommen die niet op een patroon passen (verhouding,
+# a_io, ...) blijven ongewijzigd
+def canoniek(kolom):
+    kaal = kolom.strip()
+    if kaal.lower() in TIJDKOLOMMEN:
+        return "tijd"
+    for i, patroon in enumerate(_PATRONEN):
+        m = patroon.match(kaal if i < 2 else kaal.lower())
+        if m:
+            component, lichaam = m.groups() if i == 0 else m.groups()[::-1]
+            if i < 2:
+                return f"{lichaam.lower()}_{component}"
+            if lichaam in KORTE_NAMEN:
+                return f"{KORTE_NAMEN[lichaam]}_{component}"
+    return kaal
+
+
+# Vertaling origineel -> canoniek voor een hele kop, met de eenheid van de tijdkolom.
+# Heeft een bestand meer dan één tijdkolom (stap en tijd), dan blijven die zoals ze zijn.
+def schema(kolommen):
+    vertaling = {k: canoniek(k) for k in kolommen}
+    tijd = [k for k, c in vertaling.items() if c == "tijd"]
+    if len(tijd) > 1:
+        vertaling.update({k: k.strip() for k in tijd})
+    dubbel = {c for c in vertaling.values() if list(vertaling.values()).count(c) > 1}
+    if dubbel:
+        raise ValueError(f"kolommen vallen samen onder dezelfde naam: {sorted(dubbel)}")
+    tijdeenheid = tijd[0].strip().lower() if len(tijd) == 1 else None
+    return vertaling, tijdeenheid
+
+
+# Geladen CSV-bestand: kolommen op canonieke naam (tabel["io_x"]) of op de naam uit
+# het bestand (tabel.origineel("iox")); tijdeenheid is "dag", "uur", ... uit de kop
+class Tabel:
+    def __init__(self, traject, vertaling, tijdeenheid):
+        self.traject = traject
+        self.vertaling = vertaling
+        self.terug = {c: k for k, c in vertaling.items()}
+        self.tijdeenheid = tijdeenheid
+        self.kolommen = list(vertaling.values())
+
+    def __len__(self):
+        return len(self.traject)
+
+    def __contains__(self, kolom):
+        return kolom in self.terug
+
+    def __getitem__(self, kolom):
+        if kolom not in self.terug:
+            raise KeyError(f"onbekende kolom {kolom!r}; beschikbaar: {self.kolommen}")
+        return self.traject[self.terug[kolom]]
+
+    def origineel(self, kolom):
+        return self.traject[kolom]
+
+    # Rijen [begin, eind) als dict met arrays (canonieke namen)
+    def rijbereik(self, begin, eind, kolommen=None):
+        kolommen = kolommen or self.kolommen
+        blok = self.traject.rijbereik(begin, eind, [self.terug[k] for k in kolommen])
+        return {k: blok[self.terug[k]] for k in kolommen}
+
+
+def cache_pad(pad):
+    map_, naam = os.path.split(os.path.abspath(pad))
+    return os.path.join(map_, ".cache", f"{naam}.traject")
+
+
+def _kop(pad):
+    with open(pad, newline="") as f:
+        return [k.strip() for k in f.readline().rstrip("\r\n").split(",")]
+
+
+def _sleutel(pad):
+    st = os.stat(pad)
+    return {"bron_grootte": st.st_size, "bron_mtime_ns": st.st_mtime_ns}
+
+
+# De bestaande cache, of None als die ontbreekt of niet meer bij het CSV-bestand past
+def _geldige_cache(pad):
+    cache = cache_pad(pad)
+    if not os.path.isfile(os.path.join(cache, "meta.json")):
+        return None
+    try:
+        traject = Traject(cache)
+    except (OSError, ValueError):
+        return None
+    sleutel = _sleutel(pad)
+    if any(traject.metadata.get(k) != v for k, v in sleutel.items()) or traject.kolommen != _kop(pad):
+        return None
+    return traject
+
+
+# Parse het CSV-bestand in blokken (arrays van chunk x kolommen) en schrijf ze tegelijk
+# naar een nieuwe cache; pas als het hele bestand gelezen is, vervangt die de oude
+def _parse(pad, chunk, cache):
+    kolommen = _kop(pad)
+    schrijver = None
+    if cache:
+        doel = cache_pad(pad)
+        tijdelijk = doel + ".tmp"
+        shutil.rmtree(tijdelijk, ignore_errors=True)
+        schrijver = BinaireTrajectSchrijver(tijdelijk, kolommen, chunk=1, metadata=_sleutel(pad))
+    try:
+        with open(pad, newline="") as f:
+            next(f)
+            while regels := list(itertools.islice(f, chunk)):
+                data = np.loadtxt(regels, delimiter=",", ndmin=2)
+                if schrijver is not None:
+                    schrijver._schrijf(data)
+                    schrijver.geschreven += len(data)
+                yield data
+    except BaseException:
+        if schrijver is not None:
+            schrijver._sluit()
+            shutil.rmtree(tijdelijk, ignore_errors=True)
+        raise
+    if schrijver is not None:
+        schrijver.sluit()
+        shutil.rmtree(doel, ignore_errors=True)
+        os.replace(tijdelijk, doel)
+
+
+# Zelfde interface als uitvoer.Traject, voor een zonder cache geladen bestand
+class _InGeheugen:
+    def __init__(self, kolommen, data):
+        self.kolommen = kolommen
+        self.data = data
+
+    def __len__(self):
+        return len(self.data[self.kolommen[0]]) if self.kolommen else 0
+
+    def __getitem__(self, kolom):
+        return self.data[kolom]
+
+    def rijbereik(self, begin, eind, kolommen=None):
+        return {k: self.data[k][begin:eind] for k in (kolommen or self.kolommen)}
+
+
+# Laad een CSV-bestand in zijn geheel. Met cache=True (standaard) wordt de binaire cache
+# gebruikt of aangemaakt; de kolommen zijn dan memory-maps op die cache.
+def laad(pad, cache=True, chunk=200_000):
+    if os.path.isdir(pad):
+        traject = Traject(pad)
+    elif cache:
+        traject = _geldige_cache(pad)
+        if traject is None:
+            for _ in _parse(pad, chunk, cache=True):
+                pass
+            traject = Traject(cache_pad(pad))
+    else:
+        kolommen = _kop(pad)
+        blokken = list(_parse(pad, chunk, cache=False))
+        data = np.concatenate(blokken) if blokken else np.empty((0, len(kolommen)))
+        traject = _InGeheugen(kolommen, {k: data[:, i] for i, k in enumerate(kolommen)})
+    vertaling, tijdeenheid = schema(traject.kolommen)
+    return Tabel(traject, vertaling, tijdeenheid)
+
+
+# Lees een CSV-bestand (of binaire trajectmap) in blokken van 'chunk' rijen, als dicts
+# met arrays. Het geheugengebruik hangt alleen van 'chunk' af. Uit een geldige cache
+# komen de blokken direct via memory-mapping; anders wordt er geparsed en wordt de
+# cache onderweg opgebouwd (alleen bewaard als het bestand helemaal gelezen is).
+# canonieke_namen=False geeft de kolomnamen zoals ze in het bestand staan.
+def lees_in_blokken(pad, kolommen=None, chunk=200_000, cache=True, canonieke_namen=True):
+    traject = Traject(pad) if os.path.isdir(pad) else (_geldige_cache(pad) if cache else None)
+    alle = traject.kolommen if traject is not None else _kop(pad)
+    vertaling, _ = schema(alle)
+    if canonieke_namen:
+        terug = {c: k for k, c in vertaling.items()}
+        kolommen = kolommen or [vertaling[k] for k in alle]
+        bron = [terug[k] for k in kolommen]
+    else:
+        kolommen = kolommen or alle
+        bron = kolommen
+
+    if traject is not None:
+        for begin in range(0, len(traject), chunk):
+            blok = traject.rijbereik(begin, min(begin + chunk, len(traject)), bron)
+            yield {k: blok[b] for k, b in zip(kolommen, bron)}
+        return
+    index = [alle.index(b) for b in bron]
+    for data in _parse(pad, chunk, cache):
+        yield {k: data[:, i] for k, i in zip(kolommen, index)}
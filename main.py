@@ -1,12 +1,34 @@
 import math
 import random
-import matplotlib.pyplot as plt
-import csv
+
+import numpy as np
+
+from uitvoer import TrajectSchrijver, BinaireTrajectSchrijver
+from checkpoint import schrijf_checkpoint, lees_checkpoint, rng_naar_json, rng_van_json
+from figuren import headless, baanplot
+from diagnostiek import Diagnostiek, DriftTeGroot
+from telemetrie import Telemetrie, telemetrie_aan
 
 # Gravitatieconstante
 G = 6.67430e-11
 dt = 3600  # 1 uur
 stappen = 2400000  # 100000 dagen simulatie
+formaat = "csv"  # uitvoer: "csv" (posities.csv) of "bin" (kolomgewijs binair, map posities.traject)
+
+# Checkpoints: elke 'checkpoint_elke' stappen en aan het eind wordt de volledige toestand
+# opgeslagen. Met hervatten = True gaat een run verder vanaf het laatste checkpoint;
+# een afgeronde run verlengen = 'stappen' verhogen en opnieuw starten.
+checkpoint_pad = "main_checkpoint.npz"
+checkpoint_elke = 240000
+hervatten = False
+
+# Behoudswetten (zie diagnostiek.py): elke 10000 stappen energie en impulsmoment
+# controleren; "markeer" waarschuwt bij te grote drift, "stop" breekt af. De energie telt
+# ook de onderlinge potentiaal van de manen mee, die hier verwaarloosd wordt (~1e-4 van
+# het totaal), en het zwaartepunt is niet behouden omdat Jupiter stilstaat.
+diagnostiek_elke = 10_000
+max_energiefout = 1e-3
+diagnostiek_actie = "markeer"
 
 # Massa's (kg)
 M = 1.898e27      # Jupiter
@@ -38,69 +60,126 @@ def random_pos_vel(r, v):
     vy = v * math.cos(theta)
     return x, y, vx, vy
 
-# Beginwaarden
-Mx, My, vMx, vMy = 0, 0, 0, 0
-iox, ioy, viox, vioy = random_pos_vel(r_io, v_io)
-eux, euy, veux, veuy = random_pos_vel(r_eu, v_eu)
-
-# Opslaan van posities
-pos_io = []
-pos_eu = []
-pos_jupiter = []
-theta_io = []
-theta_eu = []
+# Beginwaarden (of de toestand uit het laatste checkpoint)
+checkpoint = lees_checkpoint(checkpoint_pad) if hervatten else None
+if checkpoint is None:
+    start = 0
+    Mx, My, vMx, vMy = 0, 0, 0, 0
+    iox, ioy, viox, vioy = random_pos_vel(r_io, v_io)
+    eux, euy, veux, veuy = random_pos_vel(r_eu, v_eu)
+else:
+    start = checkpoint["step"]
+    Mx, My, vMx, vMy = checkpoint["jupiter"]
+    iox, ioy, viox, vioy = (float(x) for x in checkpoint["io"])
+    eux, euy, veux, veuy = (float(x) for x in checkpoint["europa"])
+    random.setstate(rng_van_json(checkpoint["rng"]))
+    print(f"↻ Hervat vanaf stap {start} ('{checkpoint_pad}')")
+
+# Toestand als arrays (Jupiter, Io, Europa) voor de diagnostiek
+massas = np.array([M, m_io, m_europa])
+
+def toestand():
+    pos = np.array([[Mx, My], [iox, ioy], [eux, euy]], dtype=float)
+    vel = np.array([[vMx, vMy], [viox, vioy], [veux, veuy]], dtype=float)
+    return pos, vel
+
+# Bij hervatten worden de invarianten vergeleken met de toestand van het checkpoint
+diagnostiek = Diagnostiek(*toestand(), massas, dt, diagnostiek_elke, max_energiefout,
+                          actie=diagnostiek_actie, start=start)
 
 def hoek(x, y):
     return math.atan2(y - My, x - Mx)
 
-# Simulatie
-for step in range(stappen):
-    dx_io, dy_io = iox - Mx, ioy - My
-    dx_eu, dy_eu = eux - Mx, euy - My
-
-    r_io_curr = math.hypot(dx_io, dy_io)
-    r_eu_curr = math.hypot(dx_eu, dy_eu)
-
-    F_io = G * M * m_io / r_io_curr**2
-    F_eu = G * M * m_europa / r_eu_curr**2
-
-    Fx_io = -F_io * dx_io / r_io_curr
-    Fy_io = -F_io * dy_io / r_io_curr
-    Fx_eu = -F_eu * dx_eu / r_eu_curr
-    Fy_eu = -F_eu * dy_eu / r_eu_curr
-
-    ax_io = Fx_io / m_io
-    ay_io = Fy_io / m_io
-    ax_eu = Fx_eu / m_europa
-    ay_eu = Fy_eu / m_europa
-
-    viox += ax_io * dt
-    vioy += ay_io * dt
-    veux += ax_eu * dt
-    veuy += ay_eu * dt
-
-    iox += viox * dt
-    ioy += vioy * dt
-    eux += veux * dt
-    euy += veuy * dt
-
-    if step % 240 == 0:  # elke 10 dagen
-        pos_io.append((iox, ioy))
-        pos_eu.append((eux, euy))
-        pos_jupiter.append((Mx, My))
-        theta_io.append(hoek(iox, ioy))
-        theta_eu.append(hoek(eux, euy))
-
-# Omloopdetectie
-def tel_omlopen(theta_lijst):
-    count = 0
-    for i in range(1, len(theta_lijst)):
-        if theta_lijst[i-1] < 0 and theta_lijst[i] >= 0:
-            count += 1
-    return count
-
-n_io = tel_omlopen(theta_io)
-n_eu = tel_omlopen(theta_eu)
+# Omloopdetectie: telt overgangen van hoek < 0 naar hoek >= 0 tijdens de simulatie
+omlopen = checkpoint["omlopen"] if checkpoint else {"io": 0, "eu": 0}
+vorige_hoek = checkpoint["vorige_hoek"] if checkpoint else {}
+
+def tel_omloop(naam, theta):
+    if vorige_hoek.get(naam, 0) < 0 and theta >= 0:
+        omlopen[naam] += 1
+    vorige_hoek[naam] = theta
+
+# Uitvoer: posities gaan elke 10 dagen direct naar schijf
+hervat = checkpoint["offset"] if checkpoint else None
+kolommen = ["dag", "iox", "ioy", "eux", "euy", "Mx", "My"]
+if formaat == "bin":
+    uitvoerpad = "posities.traject"
+    schrijver = BinaireTrajectSchrijver(uitvoerpad, kolommen, metadata={
+        "G": G, "dt": dt, "stappen": stappen, "sample_interval_stappen": 240,
+        "massas": {"Jupiter": M, "Io": m_io, "Europa": m_europa},
+        "e": {"Io": e_io, "Europa": e_eu}, "a": {"Io": a_io, "Europa": a_eu},
+    }, hervat=hervat)
+else:
+    uitvoerpad = "posities.csv"
+    schrijver = TrajectSchrijver(uitvoerpad, kolommen, gehele_kolommen=["dag", "Mx", "My"], hervat=hervat)
+
+# Live voortgang (zie telemetrie.py), bij elk sample, met de omloopverhouding uit de tellingen
+telemetrie = Telemetrie("main", stappen, dt, start=start, actief=telemetrie_aan())
+
+# Volledige toestand na 'stap' afgeronde stappen naar het checkpoint
+def checkpoint_opslaan(stap):
+    schrijf_checkpoint(checkpoint_pad, step=stap,
+                       jupiter=[Mx, My, vMx, vMy],
+                       io=np.array([iox, ioy, viox, vioy]),
+                       europa=np.array([eux, euy, veux, veuy]),
+                       omlopen=omlopen, vorige_hoek=vorige_hoek,
+                       rng=rng_naar_json(random.getstate()),
+                       offset=schrijver.offset())
+
+# Simulatie. Bij een stop (door de diagnostiek of via de monitor, zie telemetrie.py) wordt
+# de run afgerond: checkpoint op de stap van de stop, daarna de omlooptelling tot dan toe.
+with schrijver, telemetrie:
+    try:
+        for step in range(start, stappen):
+            dx_io, dy_io = iox - Mx, ioy - My
+            dx_eu, dy_eu = eux - Mx, euy - My
+
+            r_io_curr = math.hypot(dx_io, dy_io)
+            r_eu_curr = math.hypot(dx_eu, dy_eu)
+
+            F_io = G * M * m_io / r_io_curr**2
+            F_eu = G * M * m_europa / r_eu_curr**2
+
+            Fx_io = -F_io * dx_io / r_io_curr
+            Fy_io = -F_io * dy_io / r_io_curr
+            Fx_eu = -F_eu * dx_eu / r_eu_curr
+            Fy_eu = -F_eu * dy_eu / r_eu_curr
+
+            ax_io = Fx_io / m_io
+            ay_io = Fy_io / m_io
+            ax_eu = Fx_eu / m_europa
+            ay_eu = Fy_eu / m_europa
+
+            viox += ax_io * dt
+            vioy += ay_io * dt
+            veux += ax_eu * dt
+            veuy += ay_eu * dt
+
+            iox += viox * dt
+            ioy += vioy * dt
+            eux += veux * dt
+            euy += veuy * dt
+
+            if step % 240 == 0:  # elke 10 dagen
+                schrijver.voeg_toe(step // 240 * 10, iox, ioy, eux, euy, Mx, My)
+                tel_omloop("io", hoek(iox, ioy))
+                tel_omloop("eu", hoek(eux, euy))
+                if telemetrie.actief:
+                    telemetrie.werk_bij(step + 1, omlopen_io=omlopen["io"], omlopen_eu=omlopen["eu"],
+                                        omloopverhouding=omlopen["io"] / omlopen["eu"] if omlopen["eu"] else None)
+
+            if (step + 1) % diagnostiek_elke == 0:
+                diagnostiek.controleer(step + 1, *toestand())
+
+            if (step + 1) % checkpoint_elke == 0 or step == stappen - 1:
+                checkpoint_opslaan(step + 1)
+    except DriftTeGroot as fout:
+        print(f"❌ Simulatie afgebroken bij {fout}")
+        checkpoint_opslaan(fout.step)
+        telemetrie.sluit("afgebroken")
+
+n_io = omlopen["io"]
+n_eu = omlopen["eu"]
 
 # Verhouding vereenvoudigen
 def vereenvoudig(a, b):
@@ -115,34 +194,13 @@ print("📈 Omloopverhouding over de simulatie:")
 print(f"Io     : {n_io} omlopen")
 print(f"Europa : {n_eu} omlopen")
 print(f"➤ Verhouding Io : Europa ≈ {v1}:{v2}")
+print(diagnostiek.rapport())
+
+print(f"✅ Posities opgeslagen in '{uitvoerpad}'.")
 
-# 💾 Export naar CSV
-with open("posities.csv", "w", newline="") as f:
-    writer = csv.writer(f)
-    writer.writerow(["dag", "iox", "ioy", "eux", "euy", "Mx", "My"])
-    for i in range(len(pos_io)):
-        iox_, ioy_ = pos_io[i]
-        eux_, euy_ = pos_eu[i]
-        Mx_, My_ = pos_jupiter[i]
-        writer.writerow([i * 10, iox_, ioy_, eux_, euy_, Mx_, My_])
-
-print("✅ Posities opgeslagen in 'posities.csv'.")
-
-# 📈 Plot
-iox_list, ioy_list = zip(*pos_io)
-eux_list, euy_list = zip(*pos_eu)
-Mx_list, My_list = zip(*pos_jupiter)
-
-plt.figure(figsize=(10, 10))
-plt.plot(iox_list, ioy_list, label="Io", color="orange")
-plt.plot(eux_list, euy_list, label="Europa", color="blue")
-plt.plot(Mx_list, My_list, 'o', label="Jupiter", color="gray", markersize=4)
-
-plt.xlabel("x (meter)")
-plt.ylabel("y (meter)")
-plt.title("Banen van Io en Europa met elliptische banen (resonantieonderzoek)")
-plt.axis("equal")
-plt.grid(True)
-plt.legend()
-plt.tight_layout()
-plt.show()
+# 📈 Plot (posities teruglezen van schijf); headless: later via figuren.py
+if not headless():
+    baanplot(uitvoerpad, [("iox", "ioy", "Io", "orange", "-"),
+                          ("eux", "euy", "Europa", "blue", "-"),
+                          ("Mx", "My", "Jupiter", "gray", "o")],
+             "Banen van Io en Europa met elliptische banen (resonantieonderzoek)")
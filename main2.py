@@ -1,9 +1,15 @@
 import math
 import random
-import matplotlib.pyplot as plt
+
+from nbody import G, Lichaam, toestand, simuleer
+from analyse import OnlineAnalyse, GebeurtenisDetector
+from resonantie import Resonantie
+from uitvoer import TrajectSchrijver
+from figuren import headless, baanplot, tijdreeksplot
+from diagnostiek import Diagnostiek, DriftTeGroot
+from telemetrie import Telemetrie, telemetrie_aan
 
 # Constantes
-G = 6.67430e-11
 dt = 3600  # 1 uur
 stappen = 240000  # 10000 dagen
 
@@ -35,185 +41,108 @@ def init_pos_vel(a, e, mass, M_mass):
     vy = v * math.cos(theta)
     return x, y, vx, vy
 
-# Start Jupiter in het centrum
-Mx, My = 0.0, 0.0
-vMx, vMy = 0.0, 0.0
-
-# Startwaarden Io en Europa met random fase
+# Lichamen: Jupiter in het centrum, Io en Europa met random fase.
+# Een extra maan (bv. Ganymedes) is gewoon een extra regel in deze lijst.
 iox, ioy, viox, vioy = init_pos_vel(a_io, e_io, m_io, M)
 eux, euy, veux, veuy = init_pos_vel(a_eu, e_eu, m_eu, M)
 
-# Posities en hoeken voor omlooptelling
-pos_io = []
-pos_eu = []
-theta_io = []
-theta_eu = []
-
-def hoek(x, y):
-    return math.atan2(y - My, x - Mx)
-
-# Functie om krachten tussen twee lichamen te berekenen
-def kracht(m1, m2, x1, y1, x2, y2):
-    dx = x2 - x1
-    dy = y2 - y1
-    r = math.hypot(dx, dy)
-    if r == 0:
-        return 0, 0
-    F = G * m1 * m2 / r**2
-    Fx = F * dx / r
-    Fy = F * dy / r
-    return Fx, Fy
-
-# Simulatie loop
-for step in range(stappen):
-    # Krachten op Jupiter
-    F_Mx, F_My = 0.0, 0.0
-
-    # Krachten op Io
-    F_iox, F_ioy = 0.0, 0.0
-
-    # Krachten op Europa
-    F_eux, F_euy = 0.0, 0.0
-
-    # Jupiter - Io
-    Fx, Fy = kracht(M, m_io, Mx, My, iox, ioy)
-    F_Mx += Fx
-    F_My += Fy
-    F_iox -= Fx
-    F_ioy -= Fy
-
-    # Jupiter - Europa
-    Fx, Fy = kracht(M, m_eu, Mx, My, eux, euy)
-    F_Mx += Fx
-    F_My += Fy
-    F_eux -= Fx
-    F_euy -= Fy
-
-    # Io - Europa
-    Fx, Fy = kracht(m_io, m_eu, iox, ioy, eux, euy)
-    F_iox += Fx
-    F_ioy += Fy
-    F_eux -= Fx
-    F_euy -= Fy
-
-    # Versnellingen
-    a_Mx = F_Mx / M
-    a_My = F_My / M
-
-    a_iox = F_iox / m_io
-    a_ioy = F_ioy / m_io
-
-    a_eux = F_eux / m_eu
-    a_euy = F_euy / m_eu
-
-    # Snelheden updaten
-    vMx += a_Mx * dt
-    vMy += a_My * dt
-
-    viox += a_iox * dt
-    vioy += a_ioy * dt
-
-    veux += a_eux * dt
-    veuy += a_euy * dt
-
-    # Posities updaten
-    Mx += vMx * dt
-    My += vMy * dt
-
-    iox += viox * dt
-    ioy += vioy * dt
-
-    eux += veux * dt
-    euy += veuy * dt
-
-    # Posities en hoeken opslaan elke 10 dagen (240 stappen)
+lichamen = [
+    Lichaam("Jupiter", M, (0.0, 0.0), (0.0, 0.0)),
+    Lichaam("Io", m_io, (iox, ioy), (viox, vioy)),
+    Lichaam("Europa", m_eu, (eux, euy), (veux, veuy)),
+]
+namen, massas, pos, vel = toestand(lichamen)
+JUPITER, IO, EUROPA = 0, 1, 2
+
+# Posities en verhouding gaan elke 10 dagen naar schijf (voor de figuren); omlooptelling,
+# verhouding en resonantiehoek worden per sample bijgewerkt (analyse.py), zonder de
+# hoeken steeds opnieuw te tellen
+uitvoerpad = "verhouding_io_europa.csv"
+schrijver = TrajectSchrijver(uitvoerpad, ["dag", "iox", "ioy", "eux", "euy", "Mx", "My", "verhouding"])
+analyse = OnlineAnalyse("Io", "Europa")
+mu_io = G * (M + m_io)
+mu_eu = G * (M + m_eu)
+
+# Resonantiehoeken φ1 en φ2 over de hele run (elke 10 dagen), voor de libratieanalyse
+resonantie = Resonantie(massas, IO, EUROPA, JUPITER)
+
+# Live voortgang (zie telemetrie.py)
+telemetrie = Telemetrie("main2", stappen, dt, massas, pos, vel, IO, EUROPA, JUPITER, actief=telemetrie_aan())
+
+# Behoudswetten elke 10000 stappen (zie diagnostiek.py); "stop" breekt de run af
+# zodra |dE/E| boven de drempel komt, "markeer" geeft alleen een waarschuwing
+diagnostiek = Diagnostiek(pos, vel, massas, dt, elke=10_000, max_energiefout=1e-3, actie="markeer")
+
+# Exacte doorgangen en periapsispassages, elke stap (niet alleen elke 10 dagen)
+gebeurtenissen = GebeurtenisDetector(namen, centrum=JUPITER)
+
+def bij_stap(step, pos, vel):
+    gebeurtenissen.stap((step + 1) * dt, pos, vel)
+    diagnostiek.bij_stap(step, pos, vel)
+    telemetrie.bij_stap(step, pos, vel)
+
+    # Posities en hoeken verwerken elke 10 dagen (240 stappen)
     if step % 240 == 0:
-        pos_io.append((iox, ioy))
-        pos_eu.append((eux, euy))
-        theta_io.append(hoek(iox, ioy))
-        theta_eu.append(hoek(eux, euy))
+        analyse.sample(pos[IO] - pos[JUPITER], vel[IO] - vel[JUPITER],
+                       pos[EUROPA] - pos[JUPITER], vel[EUROPA] - vel[JUPITER], mu_io, mu_eu)
+        resonantie.neem(step * dt, pos, vel)
+        verhouding = analyse.verhouding()  # None zolang Europa nog geen omloop heeft
+        schrijver.voeg_toe(step * dt / 86400, *pos[IO], *pos[EUROPA], *pos[JUPITER],
+                           math.nan if verhouding is None else verhouding)
 
     # Elke 10000 dagen (1/24 van totale sim) printen we omlooptelling
     if step % (240 * 1000) == 0 and step > 0:
-        def tel_omlopen(theta_lijst):
-            count = 0
-            for i in range(1, len(theta_lijst)):
-                if theta_lijst[i-1] < 0 <= theta_lijst[i]:
-                    count += 1
-            return count
-        n_io = tel_omlopen(theta_io)
-        n_eu = tel_omlopen(theta_eu)
-        print(f"Na {step*dt/86400:.0f} dagen: Io omlopen={n_io}, Europa omlopen={n_eu}, verhouding ≈ {n_io/n_eu:.4f}")
+        print(analyse.rapport(step * dt / 86400))
+
+# Simulatie loop. Bij een stop (door de diagnostiek of via de monitor, zie telemetrie.py)
+# gaan de rapporten en het gebeurtenissenlogboek over de stappen tot dan toe.
+gedaan = stappen
+with schrijver, telemetrie:
+    try:
+        simuleer(pos, vel, massas, dt, stappen, bij_stap)
+    except DriftTeGroot as fout:
+        print(f"❌ Simulatie afgebroken bij {fout}")
+        gedaan = fout.step
+        telemetrie.sluit("afgebroken")
 
 # Definitieve omlooptelling
-def tel_omlopen(theta_lijst):
-    count = 0
-    for i in range(1, len(theta_lijst)):
-        if theta_lijst[i-1] < 0 <= theta_lijst[i]:
-            count += 1
-    return count
-
-n_io = tel_omlopen(theta_io)
-n_eu = tel_omlopen(theta_eu)
+n_io = analyse.omlopen["Io"]
+n_eu = analyse.omlopen["Europa"]
 
 from math import gcd
 def vereenvoudig(a, b):
     g = gcd(a, b)
     return a // g, b // g
 
-v1, v2 = vereenvoudig(n_io, n_eu)
-
-print("\n✅ Simulatie voltooid!")
+if gedaan == stappen:
+    print("\n✅ Simulatie voltooid!")
+else:
+    print(f"\n⚠️ Simulatie gestopt na {gedaan} van {stappen} stappen")
 print(f"Io omlopen: {n_io}")
 print(f"Europa omlopen: {n_eu}")
-print(f"Verhouding Io : Europa ≈ {v1}:{v2} ({n_io/n_eu:.4f})")
-# Verhouding van omwentelingen over tijd
-verhouding_tijd = []
-omlopen_io = 0
-omlopen_eu = 0
-
-for i in range(1, len(theta_io)):
-    if theta_io[i-1] < 0 <= theta_io[i]:
-        omlopen_io += 1
-    if theta_eu[i-1] < 0 <= theta_eu[i]:
-        omlopen_eu += 1
-    if omlopen_eu > 0:
-        verhouding_tijd.append(omlopen_io / omlopen_eu)
-    else:
-        verhouding_tijd.append(None)  # Voorkom deling door 0
-
-# Tijden in dagen
-tijden = [i * 10 for i in range(len(verhouding_tijd))]
-
-# Plot verhouding in de tijd
-plt.figure(figsize=(10, 5))
-plt.plot(tijden, verhouding_tijd, label="Io / Europa omloopverhouding", color="purple")
-plt.axhline(2.0, color="gray", linestyle="--", label="2:1 resonantie")
-plt.xlabel("Tijd (dagen)")
-plt.ylabel("Omloopverhouding")
-plt.title("Verhouding Io : Europa omwentelingen in de tijd")
-plt.grid(True)
-plt.legend()
-plt.tight_layout()
-plt.show()
-
-
-# Plot banen
-iox_list, ioy_list = zip(*pos_io)
-eux_list, euy_list = zip(*pos_eu)
-
-import matplotlib.pyplot as plt
-plt.figure(figsize=(10, 10))
-plt.plot(iox_list, ioy_list, label="Io", color="orange")
-plt.plot(eux_list, euy_list, label="Europa", color="blue")
-plt.plot([Mx], [My], 'o', color="gray", markersize=6, label="Jupiter")
-plt.xlabel("x (m)")
-plt.ylabel("y (m)")
-plt.title("Baan Io en Europa met onderlinge gravitatie en willekeurige startposities")
-plt.axis("equal")
-plt.grid(True)
-plt.legend()
-plt.show()
-# Verhouding van omwentelingen over tijd
-...
-plt.show()
+if n_eu:
+    v1, v2 = vereenvoudig(n_io, n_eu)
+    print(f"Verhouding Io : Europa ≈ {v1}:{v2} ({n_io/n_eu:.4f})")
+print(resonantie.rapport())
+print(diagnostiek.rapport())
+
+# Perioden uit de geïnterpoleerde gebeurtenissen
+P_io = gebeurtenissen.periode("Io")
+P_eu = gebeurtenissen.periode("Europa")
+if P_io and P_eu:
+    print(f"Omlooptijd Io: {P_io/86400:.4f} dagen, Europa: {P_eu/86400:.4f} dagen, "
+          f"verhouding P_Europa / P_Io ≈ {P_eu/P_io:.5f}")
+gebeurtenissen.naar_csv("gebeurtenissen_io_europa.csv")
+print("✅ Gebeurtenissen opgeslagen in 'gebeurtenissen_io_europa.csv'.")
+print(f"✅ Posities en verhouding opgeslagen in '{uitvoerpad}'.")
+
+# Figuren (uit het CSV-bestand); headless: later via figuren.py
+if not headless():
+    tijdreeksplot(uitvoerpad, "dag", "verhouding", "Verhouding Io : Europa omwentelingen in de tijd",
+                  label="Io / Europa omloopverhouding", xlabel="Tijd (dagen)",
+                  ylabel="Omloopverhouding", lijnen=[(2.0, "2:1 resonantie")])
+    baanplot(uitvoerpad, [("iox", "ioy", "Io", "orange", "-"),
+                          ("eux", "euy", "Europa", "blue", "-"),
+                          ("Mx", "My", "Jupiter", "gray", "o")],
+             "Baan Io en Europa met onderlinge gravitatie en willekeurige startposities",
+             eenheid="m")
@@ -1,6 +1,11 @@
 import math
 import random
-import matplotlib.pyplot as plt
+
+import numpy as np
+
+from kepler import kepler_baan, elementen
+from uitvoer import TrajectSchrijver
+from figuren import headless, baanplot, tijdreeksplot
 
 # Constants
 G = 6.67430e-11
@@ -35,65 +40,23 @@ def init_pos_vel(a, e, M_mass):
 iox, ioy, viox, vioy = init_pos_vel(a_io, e_io, M)
 eux, euy, veux, veuy = init_pos_vel(a_eu, e_eu, M)
 
-# Jupiter
-Mx, My = 0.0, 0.0
-
-# Lijsten
-pos_io = []
-pos_eu = []
-theta_io = []
-theta_eu = []
-
-def hoek(x, y):
-    return math.atan2(y - My, x - Mx)
-
-# Simulatie
-for step in range(stappen):
-    # Io → alleen zwaartekracht van Jupiter
-    dx_io = iox - Mx
-    dy_io = ioy - My
-    r_io = math.hypot(dx_io, dy_io)
-    F_io = G * M * m_io / r_io**2
-    a_iox = -F_io * dx_io / r_io / m_io
-    a_ioy = -F_io * dy_io / r_io / m_io
-
-    # Europa → alleen zwaartekracht van Jupiter
-    dx_eu = eux - Mx
-    dy_eu = euy - My
-    r_eu = math.hypot(dx_eu, dy_eu)
-    F_eu = G * M * m_eu / r_eu**2
-    a_eux = -F_eu * dx_eu / r_eu / m_eu
-    a_euy = -F_eu * dy_eu / r_eu / m_eu
-
-    # Snelheden bijwerken
-    viox += a_iox * dt
-    vioy += a_ioy * dt
-    veux += a_eux * dt
-    veuy += a_euy * dt
-
-    # Posities bijwerken
-    iox += viox * dt
-    ioy += vioy * dt
-    eux += veux * dt
-    euy += veuy * dt
-
-    # Hoeken en posities opslaan
-    if step % 240 == 0:
-        pos_io.append((iox, ioy))
-        pos_eu.append((eux, euy))
-        theta_io.append(hoek(iox, ioy))
-        theta_eu.append(hoek(eux, euy))
-
-# Omlooptelling (aan hand van 0-passage in hoek)
-def tel_omlopen(theta_lijst):
-    count = 0
-    for i in range(1, len(theta_lijst)):
-        if theta_lijst[i-1] < 0 <= theta_lijst[i]:
-            count += 1
-    return count
-
-n_io = tel_omlopen(theta_io)
-n_eu = tel_omlopen(theta_eu)
+# Zonder onderlinge gravitatie voelt elke maan alleen Jupiter (die stilstaat): dat is
+# precies het Keplerprobleem, dus de banen worden analytisch uitgerekend in plaats van
+# stap voor stap geïntegreerd. Samples op dezelfde tijden als voorheen: na stap
+# 0, 240, 480, ... (elke 10 dagen).
+mu = G * M
+tijden = (np.arange(0, stappen, 240) + 1) * dt
+pos0 = np.array([[iox, ioy], [eux, euy]])
+vel0 = np.array([[viox, vioy], [veux, veuy]])
+pos, vel = kepler_baan(pos0, vel0, mu, tijden)          # (samples, 2, 2)
+a_t, e_t, varpi_t, lam_t = elementen(pos, vel, mu)      # (samples, 2)
+pos_io, pos_eu = pos[:, 0], pos[:, 1]
+
+# Omlooptelling (aan hand van 0-passage in hoek), per sample cumulatief
+theta = np.arctan2(pos[..., 1], pos[..., 0])
+doorgangen = (theta[:-1] < 0) & (theta[1:] >= 0)
+omlopen = np.concatenate([np.zeros((1, 2), dtype=int), np.cumsum(doorgangen, axis=0)])
+n_io, n_eu = (int(n) for n in omlopen[-1])
 
 from math import gcd
 def vereenvoudig(a, b):
@@ -106,52 +69,28 @@ print("\n🧪 Simulatie zonder onderlinge gravitatie")
 print(f"Io omlopen: {n_io}")
 print(f"Europa omlopen: {n_eu}")
 print(f"Verhouding Io : Europa ≈ {v1}:{v2} ({n_io/n_eu:.4f})")
-# Verhouding van omwentelingen over tijd
-verhouding_tijd = []
-omlopen_io = 0
-omlopen_eu = 0
-
-for i in range(1, len(theta_io)):
-    if theta_io[i-1] < 0 <= theta_io[i]:
-        omlopen_io += 1
-    if theta_eu[i-1] < 0 <= theta_eu[i]:
-        omlopen_eu += 1
-    if omlopen_eu > 0:
-        verhouding_tijd.append(omlopen_io / omlopen_eu)
-    else:
-        verhouding_tijd.append(None)  # Voorkom deling door 0
-
-# Tijden in dagen
-tijden = [i * 10 for i in range(len(verhouding_tijd))]
-
-# Plot verhouding in de tijd
-plt.figure(figsize=(10, 5))
-plt.plot(tijden, verhouding_tijd, label="Io / Europa omloopverhouding", color="purple")
-plt.axhline(2.0, color="gray", linestyle="--", label="2:1 resonantie")
-plt.xlabel("Tijd (dagen)")
-plt.ylabel("Omloopverhouding")
-plt.title("Verhouding Io : Europa omwentelingen in de tijd")
-plt.grid(True)
-plt.legend()
-plt.tight_layout()
-plt.show()
-
-# Plot banen
-iox_list, ioy_list = zip(*pos_io)
-eux_list, euy_list = zip(*pos_eu)
-
-plt.figure(figsize=(10, 10))
-plt.plot(iox_list, ioy_list, label="Io", color="orange")
-plt.plot(eux_list, euy_list, label="Europa", color="blue")
-plt.plot([0], [0], 'o', color="gray", markersize=6, label="Jupiter")
-plt.xlabel("x (m)")
-plt.ylabel("y (m)")
-plt.title("Io en Europa zonder onderlinge zwaartekracht (geen resonantie mogelijk)")
-plt.axis("equal")
-plt.grid(True)
-plt.legend()
-plt.show()
-
-# Verhouding van omwentelingen over tijd
-...
-plt.show()
+
+# Verhouding van omwentelingen over tijd (NaN zolang Europa nog geen omloop heeft)
+with np.errstate(divide="ignore", invalid="ignore"):
+    verhouding = np.where(omlopen[:, 1] > 0, omlopen[:, 0] / omlopen[:, 1], np.nan)
+
+# Posities, verhouding en baanelementen naar schijf (voor de figuren en resonantieanalyse)
+uitvoerpad = "verhouding_zonder_gravitatie.csv"
+kolommen = ["dag", "iox", "ioy", "eux", "euy", "verhouding"]
+kolommen += [f"{el}_{maan}" for maan in ("io", "eu") for el in ("a", "e", "varpi", "lam")]
+with TrajectSchrijver(uitvoerpad, kolommen, gehele_kolommen=["dag"]) as schrijver:
+    for i in range(len(tijden)):
+        schrijver.voeg_toe(i * 10, *pos_io[i], *pos_eu[i], verhouding[i],
+                           a_t[i, 0], e_t[i, 0], varpi_t[i, 0], lam_t[i, 0],
+                           a_t[i, 1], e_t[i, 1], varpi_t[i, 1], lam_t[i, 1])
+print(f"✅ Posities, verhouding en baanelementen opgeslagen in '{uitvoerpad}'.")
+
+# Figuren (uit het CSV-bestand); headless: later via figuren.py
+if not headless():
+    tijdreeksplot(uitvoerpad, "dag", "verhouding", "Verhouding Io : Europa omwentelingen in de tijd",
+                  label="Io / Europa omloopverhouding", xlabel="Tijd (dagen)",
+                  ylabel="Omloopverhouding", lijnen=[(2.0, "2:1 resonantie")])
+    baanplot(uitvoerpad, [("iox", "ioy", "Io", "orange", "-"),
+                          ("eux", "euy", "Europa", "blue", "-")],
+             "Io en Europa zonder onderlinge zwaartekracht (geen resonantie mogelijk)",
+             eenheid="m", punten=[(0, 0, "Jupiter", "gray")])
@@ -1,12 +1,21 @@
 import math
-import matplotlib.pyplot as plt
 import csv
 
+from nbody import G, Lichaam, toestand, simuleer
+from integratoren import INTEGRATOREN
+from kernel import KERNEL_METHODEN, simuleer_snel
+from sampling import KopStaart
+from diagnostiek import Diagnostiek, DriftTeGroot
+from profiel import Profiel, profiel_pad
+from telemetrie import Telemetrie, telemetrie_aan
+from figuren import headless, baanplot
+
 
 # Constantes
-G = 6.67430e-11     # Gravitatieconstante in m^3/kg/s^2
 dt = 3600           # Tijdsinterval: 1 uur (in seconden)
 stappen = 1_000_000 # Simuleer 5 miljoen uur (ongeveer 570 jaar)
+methode = "euler"   # Integrator: euler, leapfrog, yoshida4, rk45, wisdom_holman
+                    # (euler en leapfrog draaien via de snelle kernel, zie kernel.py)
 
 
 # Massa's (in kg)
@@ -35,159 +44,83 @@ v1 = v1_circ * math.sqrt((1 - e1) / (1 + e1))
 v2 = v2_circ * math.sqrt((1 - e2) / (1 + e2))
 
 
-# Beginposities (op apoapsis, voor visueel effect)
-Mx, My = 0, 0
-m1x, m1y = r1 * (1 + e1), 0       # Io op apoapsis
-m2x, m2y = 0, r2 * (1 + e2)       # Europa op apoapsis
-
-
-# Beginsnelheden (loodrecht op straalvector)
-vMx, vMy = 0, 0
-vm1x, vm1y = 0, -v1               # Io
-vm2x, vm2y = v2, 0                # Europa
-
-
-# Positielijsten
-uren = []
-posities_m1 = []
-posities_m2 = []
-posities_M = []
-
-
-# Simulatie
-for step in range(stappen):
-   # Afstanden
-   dxMm1 = m1x - Mx
-   dyMm1 = m1y - My
-   dxMm2 = m2x - Mx
-   dyMm2 = m2y - My
-   dxm1m2 = m2x - m1x
-   dym1m2 = m2y - m1y
-
-
-   rMm1 = math.hypot(dxMm1, dyMm1)
-   rMm2 = math.hypot(dxMm2, dyMm2)
-   rm1m2 = math.hypot(dxm1m2, dym1m2)
-
-
-   # Gravitatiekrachten
-   FzMm1 = G * M * m1 / rMm1**2
-   FzMm2 = G * M * m2 / rMm2**2
-   Fzm1m2 = G * m1 * m2 / rm1m2**2
-
-
-   # Richtingen van krachten
-   FzMm1x = FzMm1 * dxMm1 / rMm1
-   FzMm1y = FzMm1 * dyMm1 / rMm1
-
-
-   FzMm2x = FzMm2 * dxMm2 / rMm2
-   FzMm2y = FzMm2 * dyMm2 / rMm2
-
-
-   Fzm1m2x = Fzm1m2 * dxm1m2 / rm1m2
-   Fzm1m2y = Fzm1m2 * dym1m2 / rm1m2
-
-
-   # Totale krachten
-   FMx = FzMm1x + FzMm2x
-   FMy = FzMm1y + FzMm2y
-
-
-   Fm1x = -FzMm1x + Fzm1m2x
-   Fm1y = -FzMm1y + Fzm1m2y
-
-
-   Fm2x = -FzMm2x - Fzm1m2x
-   Fm2y = -FzMm2y - Fzm1m2y
+# Lichamen: beginposities op apoapsis, beginsnelheden loodrecht op straalvector.
+# Extra lichamen toevoegen = extra regel in deze lijst.
+lichamen = [
+    Lichaam("Jupiter", M, (0.0, 0.0), (0.0, 0.0)),
+    Lichaam("Io", m1, (r1 * (1 + e1), 0.0), (0.0, -v1)),
+    Lichaam("Europa", m2, (0.0, r2 * (1 + e2)), (v2, 0.0)),
+]
+namen, massas, pos, vel = toestand(lichamen)
 
+# Profiel van de run (zie profiel.py): tijd per fase en tellers, naast de CSV weggeschreven
+profiel = Profiel()
 
-   # Versnellingen
-   aMx = FMx / M
-   aMy = FMy / M
+# Live voortgang (zie telemetrie.py)
+telemetrie = Telemetrie("main4", stappen, dt, massas, pos, vel, actief=telemetrie_aan())
 
 
-   am1x = Fm1x / m1
-   am1y = Fm1y / m1
+# Opslaan van eerste 1000 en laatste 1000 uur (laatste 1000 in een ringbuffer)
+sampler = KopStaart(1000, stappen)
 
 
-   am2x = Fm2x / m2
-   am2y = Fm2y / m2
+# Behoudswetten elke 10000 stappen (zie diagnostiek.py); "stop" breekt de run af
+# zodra |dE/E| boven de drempel komt, "markeer" geeft alleen een waarschuwing
+diagnostiek = Diagnostiek(pos, vel, massas, dt, elke=10_000, max_energiefout=1e-3, actie="markeer")
 
 
-   # Snelheden bijwerken
-   vMx += aMx * dt
-   vMy += aMy * dt
+def bij_stap(step, pos, vel):
+   sampler.bij_stap(step, pos, vel)
+   diagnostiek.bij_stap(step, pos, vel)
+   telemetrie.bij_stap(step, pos, vel)
 
 
-   vm1x += am1x * dt
-   vm1y += am1y * dt
+def bij_blok(eind, steps, pos_samples, vel_samples, pos, vel):
+   sampler.bij_blok(eind, steps, pos_samples, vel_samples, pos, vel)
+   diagnostiek.bij_blok(eind, steps, pos_samples, vel_samples, pos, vel)
+   telemetrie.bij_blok(eind, steps, pos_samples, vel_samples, pos, vel)
 
 
-   vm2x += am2x * dt
-   vm2y += am2y * dt
-
-
-   # Posities bijwerken
-   Mx += vMx * dt
-   My += vMy * dt
-
-
-   m1x += vm1x * dt
-   m1y += vm1y * dt
-
-
-   m2x += vm2x * dt
-   m2y += vm2y * dt
-
-
-   # Opslaan van eerste 1000 en laatste 1000 uur
-   if step < 1000 or step >= stappen - 1000:
-       uren.append(step)
-       posities_m1.append((m1x, m1y))
-       posities_m2.append((m2x, m2y))
-       posities_M.append((Mx, My))
-
-
-print("✅ Simulatie voltooid. Eerste en laatste 1000 uurposities opgeslagen.")
-
-
-# CSV-export
-with open("posities_io_europa.csv", "w", newline="") as f:
+# Simulatie
+gedaan = stappen
+try:
+   with profiel.fase("integratie"):
+      if methode in KERNEL_METHODEN:
+         simuleer_snel(pos, vel, massas, dt, stappen, profiel.meet("bewaar", sampler.bewaar),
+                       profiel.meet("bij_blok", bij_blok), methode=methode)
+      else:
+         simuleer(pos, vel, massas, dt, stappen, profiel.meet("bij_stap", bij_stap, 64),
+                  stapfunctie=profiel.meet("stapfunctie", INTEGRATOREN[methode], 64, telt="krachtevaluaties"))
+   print("✅ Simulatie voltooid. Eerste en laatste 1000 uurposities opgeslagen.")
+except DriftTeGroot as fout:
+   print(f"❌ Simulatie afgebroken bij {fout}")
+   gedaan = fout.step
+profiel.tel("stappen", gedaan)
+telemetrie.sluit("klaar" if gedaan == stappen else "afgebroken")
+if methode in KERNEL_METHODEN:
+   profiel.tel("krachtevaluaties", gedaan)   # één evaluatie per stap
+print(diagnostiek.rapport())
+
+
+# CSV-export (kolommen: uur, Io, Europa, Jupiter)
+uren, posities = sampler.resultaat()
+with profiel.fase("csv_export"), open("posities_io_europa.csv", "w", newline="") as f:
    writer = csv.writer(f)
    writer.writerow(["uur", "Io_x", "Io_y", "Europa_x", "Europa_y", "Jupiter_x", "Jupiter_y"])
-   for i in range(len(uren)):
-       m1x_i, m1y_i = posities_m1[i]
-       m2x_i, m2y_i = posities_m2[i]
-       Mx_i, My_i = posities_M[i]
-       writer.writerow([uren[i], m1x_i, m1y_i, m2x_i, m2y_i, Mx_i, My_i])
-
+   for uur, p in zip(uren.tolist(), posities.tolist()):
+       writer.writerow([uur, *p[1], *p[2], *p[0]])
+   profiel.tel("samples", len(uren))
+   profiel.tel("bytes", f.tell())
 
 print("✅ Posities opgeslagen in 'posities_io_europa.csv'.")
+print(profiel.rapport())
+profiel.schrijf(profiel_pad("posities_io_europa.csv"))
 
 
-# Visualisatie
-m1x_list, m1y_list = zip(*posities_m1)
-m2x_list, m2y_list = zip(*posities_m2)
-Mx_list, My_list = zip(*posities_M)
-
-
-plt.figure(figsize=(10, 10))
-plt.plot(m1x_list, m1y_list, label="Io (e ≈ 0.0041)", color="blue")
-plt.plot(m2x_list, m2y_list, label="Europa (e ≈ 0.009)", color="green")
-plt.plot(Mx_list, My_list, 'o', color="orange", label="Jupiter", markersize=3)
-
-
-plt.xlabel("x (meter)")
-plt.ylabel("y (meter)")
-plt.title("Begin- en eindbanen van Io en Europa (elliptisch, dt = 1 uur)")
-plt.axis("equal")
-plt.grid(True)
-plt.legend()
-plt.tight_layout()
-plt.show()
-
-
-
-
-
+# Visualisatie (uit het CSV-bestand); headless: later via figuren.py
+if not headless():
+   baanplot("posities_io_europa.csv",
+            [("Io_x", "Io_y", "Io (e ≈ 0.0041)", "blue", "-"),
+             ("Europa_x", "Europa_y", "Europa (e ≈ 0.009)", "green", "-"),
+             ("Jupiter_x", "Jupiter_y", "Jupiter", "orange", "o")],
+            "Begin- en eindbanen van Io en Europa (elliptisch, dt = 1 uur)")
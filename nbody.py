@@ -0,0 +1,106 @@
+import math
+from collections import namedtuple
+
+import numpy as np
+
+# Gravitatieconstante
+G = 6.67430e-11
+
+# Een lichaam in de simulatie: naam, massa (kg), beginpositie (m) en beginsnelheid (m/s).
+# Met test=True is het een testdeeltje: het voelt de massieve lichamen, maar trekt zelf
+# aan niets (ringdeeltjes, kleine maantjes, puin in een schijf).
+Lichaam = namedtuple("Lichaam", ["naam", "massa", "pos", "vel", "test"], defaults=(False,))
+
+
+# Zet een lijst lichamen om naar arrays: namen, massa's (N,), posities en snelheden (N, D).
+# Testdeeltjes krijgen in de massa-array massa 0.
+def toestand(lichamen):
+    namen = [l.naam for l in lichamen]
+    massas = np.array([0.0 if l.test else l.massa for l in lichamen], dtype=float)
+    pos = np.array([l.pos for l in lichamen], dtype=float)
+    vel = np.array([l.vel for l in lichamen], dtype=float)
+    return namen, massas, pos, vel
+
+
+# Versnellingen van alle lichamen door hun onderlinge gravitatie, in één keer.
+# pos heeft vorm (..., N, D); massas heeft vorm (N,) of (..., N).
+# Extra voorloop-dimensies (bv. meerdere runs tegelijk) worden meegenomen.
+# Lichamen met massa 0 zijn testdeeltjes; dan kost een evaluatie O(N_massief x N).
+def versnellingen(pos, massas, G=G):
+    massas = np.asarray(massas)
+    if massas.ndim == 1 and not np.all(massas > 0):
+        return versnellingen_testdeeltjes(pos, massas, massas > 0, G)
+    return _versnellingen_direct(pos, massas, G)
+
+
+def _versnellingen_direct(pos, massas, G=G):
+    n = pos.shape[-2]
+    d = pos[..., None, :, :] - pos[..., :, None, :]   # d[i, j] = r_j - r_i
+    r2 = np.einsum("...ijk,...ijk->...ij", d, d)
+    idx = np.arange(n)
+    r2[..., idx, idx] = np.inf                        # geen kracht van een lichaam op zichzelf
+    factor = G * np.asarray(massas)[..., None, :] / (r2 * np.sqrt(r2))
+    return np.einsum("...ij,...ijk->...ik", factor, d)
+
+
+# Versnellingen met gescheiden actieve (massieve) en passieve lichamen (testdeeltjes).
+# De actieve lichamen trekken aan elkaar en aan alle testdeeltjes; testdeeltjes
+# onderling en op de actieve lichamen worden overgeslagen.
+def versnellingen_testdeeltjes(pos, massas, actief, G=G):
+    passief = ~actief
+    acc = np.zeros_like(pos)
+    pos_actief = pos[..., actief, :]
+    m_actief = massas[actief]
+    if pos_actief.shape[-2] > 1:
+        acc[..., actief, :] = _versnellingen_direct(pos_actief, m_actief, G)
+    d = pos_actief[..., None, :, :] - pos[..., passief, None, :]   # (..., N_passief, N_actief, D)
+    r2 = np.einsum("...ijk,...ijk->...ij", d, d)
+    factor = G * m_actief / (r2 * np.sqrt(r2))
+    acc[..., passief, :] = np.einsum("...ij,...ijk->...ik", factor, d)
+    return acc
+
+
+# Eén stap semi-impliciete Euler (v += a*dt; x += v*dt), zoals in de oorspronkelijke scripts.
+# pos en vel worden ter plekke bijgewerkt; geeft het aantal krachtevaluaties terug.
+# Andere integratoren met dezelfde vorm staan in integratoren.py.
+def stap(pos, vel, massas, dt, G=G):
+    vel += versnellingen(pos, massas, G) * dt
+    pos += vel * dt
+    return 1
+
+
+# Integreer een systeem tot stap 'stappen' met de gegeven stapfunctie.
+# Na elke stap wordt bij_stap(step, pos, vel) aangeroepen (bv. om posities op te slaan).
+# Met 'start' gaat een run verder vanaf een eerder bereikte stap (zie checkpoint.py).
+def simuleer(pos, vel, massas, dt, stappen, bij_stap=None, G=G, stapfunctie=stap, start=0):
+    for step in range(start, stappen):
+        stapfunctie(pos, vel, massas, dt, G)
+        if bij_stap is not None:
+            bij_stap(step, pos, vel)
+    return pos, vel
+
+
+# Hoek van een lichaam t.o.v. een centraal lichaam
+def hoek(pos, i, centrum=0):
+    return math.atan2(pos[i, 1] - pos[centrum, 1], pos[i, 0] - pos[centrum, 0])
+
+
+# Totale energie (kinetisch + potentieel) van het systeem
+def energie(pos, vel, massas, G=G):
+    kinetisch = 0.5 * np.sum(massas * np.sum(vel * vel, axis=-1), axis=-1)
+    if massas.ndim == 1 and not np.all(massas > 0):
+        # Testdeeltjes dragen niets bij aan de energie
+        actief = massas > 0
+        return kinetisch + energie(pos[..., actief, :], np.zeros_like(vel[..., actief, :]), massas[actief], G)
+    d = pos[..., None, :, :] - pos[..., :, None, :]
+    r = np.sqrt(np.einsum("...ijk,...ijk->...ij", d, d))
+    i, j = np.triu_indices(pos.shape[-2], k=1)
+    potentieel = -G * np.sum(massas[..., i] * massas[..., j] / r[..., i, j], axis=-1)
+    return kinetisch + potentieel
+
+
+# Totaal impulsmoment: in 2D de z-component (scalar), in 3D de vector
+def impulsmoment(pos, vel, massas):
+    if pos.shape[-1] == 2:
+        return np.sum(massas * (pos[..., 0] * vel[..., 1] - pos[..., 1] * vel[..., 0]), axis=-1)
+    return np.sum(massas[..., None] * np.cross(pos, vel), axis=-2)
@@ -0,0 +1,106 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+
+
+# Lichte instrumentatie van een run: tijd per fase en tellers (stappen, krachtevaluaties,
+# samples, bytes). Bedoeld om altijd aan te laten staan:
+#  - fase(naam) is een contextmanager voor grove stukken (opbouw, integratie, export);
+#  - meet(naam, functie, steekproef=k) omhult een functie die heel vaak wordt aangeroepen
+#    (de stapfunctie, een hook): elke aanroep wordt geteld, maar alleen 1 op de k wordt
+#    getimed; de totale tijd wordt daaruit geschat. Kosten: één teller per aanroep en
+#    twee klokaanroepen per k aanroepen.
+# Fases mogen in elkaar liggen (het wegschrijven gebeurt bv. binnen de hooks), dus de
+# percentages tellen niet per se op tot 100%.
+# rapport() geeft een tekstoverzicht, schrijf(pad) een JSON-bestand naast de uitvoer.
+class Profiel:
+    def __init__(self):
+        self.begin = time.perf_counter()
+        self.tijden = {}        # naam -> gemeten seconden
+        self.aanroepen = {}     # naam -> aantal aanroepen
+        self.gemeten = {}       # naam -> aantal getimede aanroepen
+        self.tellers = {}
+
+    def _noteer(self, naam, duur, aanroepen=1, gemeten=1):
+        self.tijden[naam] = self.tijden.get(naam, 0.0) + duur
+        self.aanroepen[naam] = self.aanroepen.get(naam, 0) + aanroepen
+        self.gemeten[naam] = self.gemeten.get(naam, 0) + gemeten
+
+    @contextmanager
+    def fase(self, naam):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._noteer(naam, time.perf_counter() - t0)
+
+    def tel(self, naam, n=1):
+        self.tellers[naam] = self.tellers.get(naam, 0) + n
+
+    # Omhul 'functie' zodat de aanroepen onder 'naam' geteld en (steekproefsgewijs) getimed
+    # worden. Met 'telt' wordt de returnwaarde opgeteld bij die teller (bv. de stapfuncties
+    # geven het aantal krachtevaluaties terug).
+    def meet(self, naam, functie, steekproef=1, telt=None):
+        self._noteer(naam, 0.0, 0, 0)
+        aanroepen, tijden, gemeten, tellers = self.aanroepen, self.tijden, self.gemeten, self.tellers
+
+        def omhuld(*args, **kwargs):
+            aanroepen[naam] += 1
+            if aanroepen[naam] % steekproef:
+                resultaat = functie(*args, **kwargs)
+            else:
+                t0 = time.perf_counter()
+                resultaat = functie(*args, **kwargs)
+                tijden[naam] += time.perf_counter() - t0
+                gemeten[naam] += 1
+            if telt is not None:
+                tellers[telt] = tellers.get(telt, 0) + resultaat
+            return resultaat
+        return omhuld
+
+    # Tellers en schrijftijd van een uitvoer.TrajectSchrijver overnemen
+    def schrijver(self, schrijver):
+        self.tel("samples", schrijver.geschreven)
+        self.tel("bytes", schrijver.bytes_geschreven)
+        self._noteer("schrijven", schrijver.schrijftijd, schrijver.flushes, schrijver.flushes)
+
+    # Geschatte totale tijd per fase (bij steekproeven: gemiddelde x aantal aanroepen)
+    def fases(self):
+        uit = {}
+        for naam, tijd in self.tijden.items():
+            n, gemeten = self.aanroepen[naam], self.gemeten[naam]
+            totaal = tijd * n / gemeten if gemeten else 0.0
+            uit[naam] = {"s": totaal, "aanroepen": n, "gemeten": gemeten,
+                         "us_per_aanroep": 1e6 * totaal / n if n else 0.0}
+        return uit
+
+    def als_dict(self):
+        wandtijd = time.perf_counter() - self.begin
+        tellers = dict(self.tellers)
+        if "stappen" in tellers and wandtijd > 0:
+            tellers["stappen_per_s"] = tellers["stappen"] / wandtijd
+        return {"wandtijd_s": wandtijd, "fases": self.fases(), "tellers": tellers}
+
+    def rapport(self):
+        d = self.als_dict()
+        regels = [f"Profiel ({d['wandtijd_s']:.2f} s):"]
+        for naam, f in sorted(d["fases"].items(), key=lambda kv: -kv[1]["s"]):
+            aandeel = f["s"] / d["wandtijd_s"] if d["wandtijd_s"] else 0.0
+            regels.append(f"  {naam:>16}: {f['s']:9.3f} s ({aandeel:6.1%}), {f['aanroepen']} x, "
+                          f"{f['us_per_aanroep']:.2f} µs per aanroep")
+        for naam, n in d["tellers"].items():
+            regels.append(f"  {naam:>16}: {n:.0f}" if isinstance(n, float) else f"  {naam:>16}: {n}")
+        return "\n".join(regels)
+
+    def schrijf(self, pad):
+        with open(pad, "w") as f:
+            json.dump(self.als_dict(), f, indent=2)
+        print(f"✅ Profiel opgeslagen in '{pad}'.")
+
+
+# Pad van het profielrapport naast een uitvoerbestand of -map:
+# posities.csv -> posities.profiel.json, posities.traject -> posities.profiel.json
+def profiel_pad(uitvoerpad):
+    stam, _ = os.path.splitext(os.path.normpath(uitvoerpad))
+    return f"{stam}.profiel.json"
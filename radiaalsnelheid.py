@@ -0,0 +1,197 @@
+import argparse
+import math
+
+import numpy as np
+
+from nbody import simuleer
+from integratoren import INTEGRATOREN
+from configuratie import lees_config, bouw_systeem
+from laden import laad
+from figuren import pyplot, toon
+
+DAG = 86400.0
+
+
+# Eenheidsvectoren van de zichtlijn (A, D) voor kijkhoeken θ in het baanvlak (graden,
+# vanaf de x-as) en inclinatie i (90° = baanvlak van opzij gezien). In 2D ligt de
+# zichtlijn in het vlak, ingekort met sin i; in 3D is hij (cos θ sin i, sin θ sin i, cos i).
+def zichtlijn(kijkhoeken, inclinatie=90.0, D=2):
+    theta = np.radians(np.atleast_1d(np.asarray(kijkhoeken, dtype=float)))
+    i = math.radians(inclinatie)
+    richting = np.stack([np.cos(theta) * math.sin(i), np.sin(theta) * math.sin(i)], axis=-1)
+    if D == 3:
+        richting = np.concatenate([richting, np.full((len(theta), 1), math.cos(i))], axis=-1)
+    return richting
+
+
+# Radiële snelheid van lichaam 'ster' t.o.v. het zwaartepunt, voor alle kijkhoeken tegelijk.
+# vel: (..., N, D), bv. (T, N, D) voor een hele reeks samples. Geeft (..., A) terug;
+# positief = van de waarnemer af (roodverschuiving).
+def radiale_snelheid(vel, massas, ster=0, kijkhoeken=(0.0,), inclinatie=90.0):
+    vel = np.asarray(vel, dtype=float)
+    massas = np.asarray(massas, dtype=float)
+    zwaartepunt = np.einsum("n,...nd->...d", massas, vel) / np.sum(massas)
+    return (vel[..., ster, :] - zwaartepunt) @ zichtlijn(kijkhoeken, inclinatie, vel.shape[-1]).T
+
+
+# Neemt de RV-curve op tijdens de run, elke 'elke' stappen, in een vooraf gealloceerde
+# array (samples x kijkhoeken). bewaar/bij_stap/bij_blok hebben de vorm van de hooks van
+# nbody.simuleer en kernel.simuleer_snel; bij de kernel komen de snelheden uit vel_samples,
+# dus er hoeft niets als tekst weggeschreven te worden.
+class RVOpname:
+    def __init__(self, massas, stappen, elke=1, ster=0, kijkhoeken=(0.0,), inclinatie=90.0, start=0):
+        self.massas = np.asarray(massas, dtype=float)
+        self.elke = elke
+        self.ster = ster
+        self.kijkhoeken = np.atleast_1d(np.asarray(kijkhoeken, dtype=float))
+        self.inclinatie = inclinatie
+        aantal = max(0, stappen // elke - start // elke)
+        self.steps = np.empty(aantal, dtype=np.int64)
+        self.rv = np.empty((aantal, len(self.kijkhoeken)))
+        self.n = 0
+
+    def bewaar(self, step):
+        return (np.asarray(step) + 1) % self.elke == 0
+
+    def _neem(self, steps, vel):
+        rv = radiale_snelheid(vel, self.massas, self.ster, self.kijkhoeken, self.inclinatie)
+        k = len(steps)
+        self.steps[self.n:self.n + k] = steps
+        self.rv[self.n:self.n + k] = rv
+        self.n += k
+
+    def bij_stap(self, step, pos, vel):
+        if self.bewaar(step):
+            self._neem([step], vel[None])
+
+    def bij_blok(self, eind, steps, pos_samples, vel_samples, pos, vel):
+        self._neem(steps, vel_samples)
+
+    # Stapnummers (na de stap, dus tijd = (step + 1) * dt) en RV (samples x kijkhoeken)
+    def resultaat(self):
+        return self.steps[:self.n], self.rv[:self.n]
+
+
+# Amplitudespectrum van een gelijkmatig bemonsterde reeks via de FFT (O(T log T), ook
+# voor miljoenen samples). Een sinus met amplitude K geeft een piek van hoogte ~K.
+# v: (T,) of (T, A); 'opvulling' > 1 vult aan met nullen voor een fijner frequentieraster.
+def fft_periodogram(v, dt, opvulling=1):
+    v = np.asarray(v, dtype=float)
+    T = v.shape[0]
+    lengte = int(2 ** math.ceil(math.log2(max(2, T * opvulling))))
+    spectrum = np.fft.rfft(v - v.mean(axis=0), n=lengte, axis=0)
+    return np.fft.rfftfreq(lengte, dt), 2 * np.abs(spectrum) / T
+
+
+# Lomb-Scargle-periodogram (standaardnormalisatie, tussen 0 en 1) voor willekeurige,
+# ook ongelijkmatige tijden, zoals echte RV-waarnemingen. De sommen over de samples
+# worden in blokken opgebouwd, zodat het geheugen alleen van 'geheugen' afhangt; de
+# rekentijd is wel O(T x frequenties), dus voor lange gelijkmatige reeksen is
+# fft_periodogram de snelle weg.
+def lomb_scargle(t, y, frequenties, geheugen=4_000_000):
+    t = np.asarray(t, dtype=float)
+    y = np.asarray(y, dtype=float)
+    y = y - y.mean()
+    omega = 2 * np.pi * np.asarray(frequenties, dtype=float)
+    C, S, CC, SS, CS = (np.zeros(len(omega)) for _ in range(5))
+    blok = max(1, geheugen // max(1, len(omega)))
+    t0 = t[0] if len(t) else 0.0
+    for begin in range(0, len(t), blok):
+        fase = np.outer(t[begin:begin + blok] - t0, omega)
+        c, s = np.cos(fase), np.sin(fase)
+        yb = y[begin:begin + blok]
+        C += yb @ c
+        S += yb @ s
+        CC += np.sum(c * c, axis=0)
+        SS += np.sum(s * s, axis=0)
+        CS += np.sum(c * s, axis=0)
+    # Draai elke frequentie over ωτ met tan(2ωτ) = 2 Σcs / (Σcc - Σss)
+    wt = 0.5 * np.arctan2(2 * CS, CC - SS)
+    cw, sw = np.cos(wt), np.sin(wt)
+    YC = C * cw + S * sw
+    YS = S * cw - C * sw
+    CCt = CC * cw * cw + 2 * CS * cw * sw + SS * sw * sw
+    SSt = SS * cw * cw - 2 * CS * cw * sw + CC * sw * sw
+    return (YC**2 / CCt + YS**2 / SSt) / np.sum(y * y)
+
+
+# De 'n' hoogste lokale maxima van een periodogram als (frequentie, vermogen)
+def pieken(frequenties, vermogen, n=3):
+    v = np.asarray(vermogen)
+    lokaal = np.flatnonzero((v[1:-1] > v[:-2]) & (v[1:-1] >= v[2:])) + 1
+    beste = lokaal[np.argsort(v[lokaal])[::-1][:n]]
+    return [(float(frequenties[i]), float(v[i])) for i in beste]
+
+
+# Simuleer een systeem uit een config en geef (tijden in s, RV per kijkhoek) terug
+def rv_uit_config(config, stappen=None, elke=1, kijkhoeken=(0.0,), inclinatie=90.0):
+    _, massas, pos, vel = bouw_systeem(config)
+    integrator = config["integrator"]
+    stappen = stappen or integrator["stappen"]
+    dt, methode = integrator["dt"], integrator.get("methode", "leapfrog")
+    opname = RVOpname(massas, stappen, elke, 0, kijkhoeken, inclinatie)
+    from kernel import KERNEL_METHODEN, simuleer_snel   # pas hier: laadt (optioneel) numba
+    if methode in KERNEL_METHODEN:
+        simuleer_snel(pos, vel, massas, dt, stappen, opname.bewaar, opname.bij_blok, methode=methode)
+    else:
+        simuleer(pos, vel, massas, dt, stappen, opname.bij_stap, stapfunctie=INTEGRATOREN[methode])
+    steps, rv = opname.resultaat()
+    return (steps + 1) * dt, rv
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RV-curve van de ster en periodogram")
+    parser.add_argument("bron", help="config (.json) om te simuleren, of CSV/traject met snelheden")
+    parser.add_argument("--stappen", type=int)
+    parser.add_argument("--elke", type=int, default=1, help="elke k stappen een RV-sample")
+    parser.add_argument("--kijkhoek", type=float, nargs="+", default=[0.0], help="graden in het baanvlak")
+    parser.add_argument("--inclinatie", type=float, default=90.0)
+    parser.add_argument("--kolom", default="ster_vx", help="snelheidskolom bij een CSV (kijkhoek 0)")
+    parser.add_argument("--dt", type=float, default=100000, help="seconden per tijdeenheid in de CSV")
+    parser.add_argument("--methode", choices=["fft", "lomb_scargle"], default="fft")
+    parser.add_argument("--frequenties", type=int, default=5000, help="aantal frequenties (Lomb-Scargle)")
+    parser.add_argument("--png", help="figuur naar dit bestand in plaats van op het scherm")
+    args = parser.parse_args()
+
+    if args.bron.endswith(".json"):
+        t, rv = rv_uit_config(lees_config(args.bron), args.stappen, args.elke, args.kijkhoek, args.inclinatie)
+        labels = [f"θ = {h:g}°" for h in args.kijkhoek]
+    else:
+        tabel = laad(args.bron)
+        t = np.asarray(tabel["tijd"]) * args.dt
+        # De opgeslagen snelheden zijn t.o.v. de oorsprong, niet het zwaartepunt; de
+        # (constante) systeemsnelheid valt weg omdat het periodogram het gemiddelde aftrekt
+        rv = np.asarray(tabel[args.kolom])[:, None] * math.sin(math.radians(args.inclinatie))
+        labels = [args.kolom]
+    if len(t) < 3:
+        raise SystemExit("te weinig samples voor een periodogram")
+
+    if args.methode == "fft":
+        stap = np.diff(t)
+        if not np.allclose(stap, stap[0]):
+            raise SystemExit("ongelijkmatige tijden: gebruik --methode lomb_scargle")
+        f, vermogen = fft_periodogram(rv, stap[0])
+        vermogen = vermogen.reshape(len(f), -1)
+    else:
+        duur = t[-1] - t[0]
+        f = np.linspace(1 / duur, 0.5 / np.median(np.diff(t)), args.frequenties)
+        vermogen = np.stack([lomb_scargle(t, rv[:, a], f) for a in range(rv.shape[1])], axis=-1)
+
+    for a, label in enumerate(labels):
+        K = 0.5 * (rv[:, a].max() - rv[:, a].min())
+        perioden = ", ".join(f"{1 / fr / DAG:.2f} d ({p:.3g})" for fr, p in pieken(f[1:], vermogen[1:, a]))
+        print(f"{label}: K ≈ {K:.2f} m/s, pieken: {perioden}")
+
+    plt = pyplot(args.png is not None)
+    fig, (boven, onder) = plt.subplots(2, 1, figsize=(10, 8))
+    for a, label in enumerate(labels):
+        boven.plot(t / DAG, rv[:, a], lw=0.6, label=label)
+        onder.plot(1 / f[1:] / DAG, vermogen[1:, a], lw=0.8, label=label)
+    boven.set_xlabel("Tijd (dagen)")
+    boven.set_ylabel("Radiële snelheid (m/s)")
+    boven.legend()
+    onder.set_xscale("log")
+    onder.set_xlabel("Periode (dagen)")
+    onder.set_ylabel("Amplitude (m/s)" if args.methode == "fft" else "Vermogen")
+    plt.tight_layout()
+    toon(plt, args.png)
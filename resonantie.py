@@ -0,0 +1,214 @@
+import argparse
+from collections import namedtuple
+
+import numpy as np
+
+from nbody import G, simuleer
+from integratoren import INTEGRATOREN
+from kepler import elementen
+from configuratie import lees_config, bouw_systeem
+from laden import lees_in_blokken
+from radiaalsnelheid import fft_periodogram
+from uitvoer import TrajectSchrijver
+
+DAG = 86400.0
+
+
+# Resonantiehoeken van een p:q-resonantie tussen 'binnen' en 'buiten' (Io:Europa en
+# Gliese 876 c:b zijn allebei 2:1):
+#   φ1 = p·λ_buiten − q·λ_binnen − (p − q)·ϖ_binnen
+#   φ2 = p·λ_buiten − q·λ_binnen − (p − q)·ϖ_buiten
+# pos/vel t.o.v. het centrale lichaam, (..., 2). Geeft (..., 2) met [φ1, φ2] in [−π, π).
+def resonantiehoeken(pos_binnen, vel_binnen, pos_buiten, vel_buiten, mu_binnen, mu_buiten, p=2, q=1):
+    _, _, varpi_binnen, lam_binnen = elementen(pos_binnen, vel_binnen, mu_binnen)
+    _, _, varpi_buiten, lam_buiten = elementen(pos_buiten, vel_buiten, mu_buiten)
+    basis = p * lam_buiten - q * lam_binnen
+    phi = np.stack([basis - (p - q) * varpi_binnen, basis - (p - q) * varpi_buiten], axis=-1)
+    return np.mod(phi + np.pi, 2 * np.pi) - np.pi
+
+
+# Uitkomst per hoek: librerend (bool), centrum en amplitude (rad) en periode (s): bij
+# libratie die van de libratie, bij circulatie de tijd voor één volle omwenteling.
+# bepaald is False als de run te kort was om het te zeggen (librerend is dan ook False).
+Libratie = namedtuple("Libratie", ["librerend", "centrum", "amplitude", "periode", "bepaald"])
+
+
+# Libratie of circulatie van een ontwonden hoekreeks u (T, ...) op gelijkmatige tijden t.
+# Een hoek circuleert zodra hij een volle omwenteling maakt (max − min >= 2π). Blijft hij
+# daarbinnen, dan libreert hij alleen als de reeks minstens 'min_cycli' volle slingeringen
+# laat zien: zoveel keer de libratieperiode lang en 2 doorgangen van het midden per
+# slingering. Anders is de run te kort om het te zeggen en heet de hoek onbepaald. De amplitude is de halve
+# piek-tot-piekwaarde en de periode komt uit de sterkste piek van het FFT-spectrum.
+# Werkt over alle extra dimensies tegelijk (bv. runs x hoeken).
+# Let op: tussen twee samples mag de hoek minder dan π draaien, anders is de ontwonden
+# reeks (en dus de classificatie) onbetrouwbaar; bemonster dan dichter.
+def libratie(t, u, min_cycli=2):
+    t = np.asarray(t, dtype=float)
+    u = np.asarray(u, dtype=float)
+    if len(t) < 3:
+        raise ValueError("libratie: minstens drie samples nodig")
+    centrum = np.arctan2(np.mean(np.sin(u), axis=0), np.mean(np.cos(u), axis=0))
+    hoog, laag = np.max(u, axis=0), np.min(u, axis=0)
+    bereik = hoog - laag
+    f, spectrum = fft_periodogram(u, t[1] - t[0])
+    libratieperiode = 1 / f[np.argmax(spectrum[1:], axis=0) + 1]
+
+    boven = u > (hoog + laag) / 2
+    doorgangen = np.sum(boven[1:] != boven[:-1], axis=0)
+    genoeg = (doorgangen >= 2 * min_cycli) & (t[-1] - t[0] >= min_cycli * libratieperiode)
+    bepaald = (bereik >= 2 * np.pi) | genoeg
+    librerend = bepaald & (bereik < 2 * np.pi)
+    with np.errstate(divide="ignore"):
+        omwenteling = np.abs(2 * np.pi * (t[-1] - t[0]) / (u[-1] - u[0]))
+    return Libratie(librerend, centrum, np.where(librerend, bereik / 2, np.pi),
+                    np.where(librerend, libratieperiode, omwenteling), bepaald)
+
+
+# Volgt φ1 en φ2 over een hele run, in blokken: elk blok samples wordt omgerekend naar
+# hoeken en aansluitend op het vorige blok ontwonden, zodat er nooit een volledig traject
+# in het geheugen hoeft; alleen de twee hoekreeksen groeien mee.
+# pos/vel mogen extra voorloopdimensies hebben (bv. runs in ensemble.py): (T, ..., N, 2).
+# bewaar/bij_stap/bij_blok hebben de vorm van de hooks van nbody.simuleer en
+# kernel.simuleer_snel (elke 'elke' stappen een sample, tijd = (step + 1) * dt).
+class Resonantie:
+    KOLOMMEN = ["t", "phi1", "phi2"]
+
+    def __init__(self, massas, binnen, buiten, centrum=0, p=2, q=1, dt=1.0, elke=1, G=G):
+        massas = np.asarray(massas, dtype=float)
+        self.binnen, self.buiten, self.centrum = binnen, buiten, centrum
+        self.mu_binnen = G * (massas[..., centrum] + massas[..., binnen])
+        self.mu_buiten = G * (massas[..., centrum] + massas[..., buiten])
+        self.p, self.q = p, q
+        self.dt, self.elke = dt, elke
+        self._t, self._u = [], []
+        self._wachtrij = []
+        self._laatste = None
+
+    # Voeg een blok samples toe: t (T,), pos en vel (T, ..., N, 2)
+    def voeg_toe(self, t, pos, vel):
+        self._leeg_wachtrij()
+        self._voeg_toe(t, pos, vel)
+
+    def _voeg_toe(self, t, pos, vel):
+        if len(t) == 0:
+            return
+        c, i, j = self.centrum, self.binnen, self.buiten
+        phi = resonantiehoeken(pos[..., i, :] - pos[..., c, :], vel[..., i, :] - vel[..., c, :],
+                               pos[..., j, :] - pos[..., c, :], vel[..., j, :] - vel[..., c, :],
+                               self.mu_binnen, self.mu_buiten, self.p, self.q)
+        if self._laatste is not None:
+            phi = np.unwrap(np.concatenate([self._laatste[None], phi]), axis=0)[1:]
+        else:
+            phi = np.unwrap(phi, axis=0)
+        self._laatste = phi[-1]
+        self._t.append(np.asarray(t, dtype=float))
+        self._u.append(phi)
+
+    # Losse samples uit bij_stap worden per 1000 als één blok verwerkt
+    def _leeg_wachtrij(self):
+        if self._wachtrij:
+            t, pos, vel = zip(*self._wachtrij)
+            self._wachtrij = []
+            self._voeg_toe(np.array(t), np.stack(pos), np.stack(vel))
+
+    # Eén sample op tijd t (s); pos en vel (..., N, 2) worden gekopieerd
+    def neem(self, t, pos, vel):
+        self._wachtrij.append((t, pos.copy(), vel.copy()))
+        if len(self._wachtrij) >= 1000:
+            self._leeg_wachtrij()
+
+    def bewaar(self, step):
+        return (np.asarray(step) + 1) % self.elke == 0
+
+    def bij_stap(self, step, pos, vel):
+        if self.bewaar(step):
+            self.neem((step + 1) * self.dt, pos, vel)
+
+    def bij_blok(self, eind, steps, pos_samples, vel_samples, pos, vel):
+        self.voeg_toe((steps + 1) * self.dt, pos_samples, vel_samples)
+
+    # Tijden (T,) en ontwonden hoeken (T, ..., 2) over de hele run
+    def hoeken(self):
+        self._leeg_wachtrij()
+        if not self._t:
+            return np.empty(0), np.empty((0, 2))
+        return np.concatenate(self._t), np.concatenate(self._u)
+
+    # (Libratie van φ1, Libratie van φ2)
+    def classificeer(self):
+        t, u = self.hoeken()
+        uitslag = libratie(t, u)
+        return tuple(Libratie(*(np.asarray(veld)[..., i] for veld in uitslag)) for i in range(2))
+
+    def rapport(self):
+        regels = []
+        for naam, l in zip(("φ1", "φ2"), self.classificeer()):
+            if np.ndim(l.librerend) > 0:
+                regels.append(f"{naam}: librerend in {int(np.sum(l.librerend))} van de {l.librerend.size} runs"
+                              f" ({int(np.sum(~l.bepaald))} onbepaald)")
+            elif not l.bepaald:
+                regels.append(f"{naam}: onbepaald (run te kort voor een omwenteling of een paar slingeringen)")
+            elif l.librerend:
+                regels.append(f"{naam}: librerend rond {np.degrees(l.centrum):.1f}°, amplitude "
+                              f"{np.degrees(l.amplitude):.1f}°, periode {l.periode / DAG:.1f} dagen")
+            else:
+                regels.append(f"{naam}: circulerend, één omwenteling per {l.periode / DAG:.1f} dagen")
+        return "\n".join(regels)
+
+    # Hoekreeksen als CSV (t in s, φ1 en φ2 in [−π, π)), alleen voor een enkele run
+    def naar_csv(self, pad, chunk=100000):
+        t, u = self.hoeken()
+        gewikkeld = np.mod(u + np.pi, 2 * np.pi) - np.pi
+        with TrajectSchrijver(pad, self.KOLOMMEN, chunk=chunk) as schrijver:
+            for begin in range(0, len(t), chunk):
+                schrijver._schrijf(np.column_stack([t[begin:begin + chunk], gewikkeld[begin:begin + chunk]]))
+
+
+# φ1 en φ2 uit een opgeslagen traject met posities én snelheden (kolommen
+# <lichaam>_x/_y/_vx/_vy, zie laden.py), blok voor blok gelezen. massas in de volgorde
+# (centrum, binnen, buiten); dt = seconden per eenheid van de tijdkolom.
+def uit_traject(pad, centrum, binnen, buiten, massas, dt=1.0, p=2, q=1, chunk=200_000, G=G):
+    lichamen = (centrum, binnen, buiten)
+    kolommen = ["tijd"] + [f"{l}_{k}" for l in lichamen for k in ("x", "y", "vx", "vy")]
+    resonantie = Resonantie(massas, 1, 2, 0, p, q, G=G)
+    for blok in lees_in_blokken(pad, kolommen, chunk):
+        pos = np.stack([np.stack([blok[f"{l}_x"], blok[f"{l}_y"]], axis=-1) for l in lichamen], axis=1)
+        vel = np.stack([np.stack([blok[f"{l}_vx"], blok[f"{l}_vy"]], axis=-1) for l in lichamen], axis=1)
+        resonantie.voeg_toe(blok["tijd"] * dt, pos, vel)
+    return resonantie
+
+
+# Simuleer een systeem uit een config en volg de resonantiehoeken tussen twee lichamen
+# (indices in het systeem, het centrum is 0)
+def uit_config(config, binnen=1, buiten=2, stappen=None, elke=1, p=2, q=1):
+    _, massas, pos, vel = bouw_systeem(config)
+    integrator = config["integrator"]
+    stappen = stappen or integrator["stappen"]
+    dt, methode = integrator["dt"], integrator.get("methode", "leapfrog")
+    resonantie = Resonantie(massas, binnen, buiten, 0, p, q, dt, elke, config.get("G", G))
+    from kernel import KERNEL_METHODEN, simuleer_snel   # pas hier: laadt (optioneel) numba
+    if methode in KERNEL_METHODEN:
+        simuleer_snel(pos, vel, massas, dt, stappen, resonantie.bewaar, resonantie.bij_blok, methode=methode)
+    else:
+        simuleer(pos, vel, massas, dt, stappen, resonantie.bij_stap, stapfunctie=INTEGRATOREN[methode])
+    return resonantie
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resonantiehoeken φ1, φ2 en libratieanalyse")
+    parser.add_argument("config", help="config (.json), bv. systemen/gliese876_bc.json")
+    parser.add_argument("--binnen", type=int, default=1, help="index van het binnenste lichaam")
+    parser.add_argument("--buiten", type=int, default=2, help="index van het buitenste lichaam")
+    parser.add_argument("--p", type=int, default=2)
+    parser.add_argument("--q", type=int, default=1)
+    parser.add_argument("--stappen", type=int)
+    parser.add_argument("--elke", type=int, default=24, help="elke k stappen een sample")
+    parser.add_argument("--uitvoer", help="CSV met t, φ1 en φ2")
+    args = parser.parse_args()
+
+    resonantie = uit_config(lees_config(args.config), args.binnen, args.buiten, args.stappen,
+                            args.elke, args.p, args.q)
+    print(resonantie.rapport())
+    if args.uitvoer:
+        resonantie.naar_csv(args.uitvoer)
+        print(f"✅ Resonantiehoeken opgeslagen in '{args.uitvoer}'.")
@@ -0,0 +1,216 @@
+import argparse
+import os
+import time
+from functools import partial
+
+import numpy as np
+
+from configuratie import lees_config, bouw_systeem, uitvoer_lichamen
+from nbody import G as G_STANDAARD, simuleer
+from integratoren import INTEGRATOREN, integreer_adaptief
+from kernel import KERNEL_METHODEN, simuleer_snel
+from uitvoer import TrajectSchrijver, BinaireTrajectSchrijver
+from sampling import sampler_uit_config
+from diagnostiek import Diagnostiek, DriftTeGroot
+from profiel import Profiel, profiel_pad
+from telemetrie import Telemetrie, telemetrie_aan
+
+
+# Overschrijf velden uit de config met opties van de command line
+def pas_toe(config, stappen=None, dt=None, methode=None, uitvoer=None, formaat=None, seed=None,
+            eta=None, criterium=None, theta=None):
+    integrator = config.setdefault("integrator", {})
+    if theta is not None:
+        integrator.setdefault("opties", {})["theta"] = theta
+    if eta is not None:
+        integrator.setdefault("adaptief", {})["eta"] = eta
+    if criterium is not None:
+        integrator.setdefault("adaptief", {})["criterium"] = criterium
+    if stappen is not None:
+        integrator["stappen"] = stappen
+    if dt is not None:
+        integrator["dt"] = dt
+    if methode is not None:
+        integrator["methode"] = methode
+    if uitvoer is not None:
+        config.setdefault("uitvoer", {})["pad"] = uitvoer
+    if formaat is not None:
+        config.setdefault("uitvoer", {})["formaat"] = formaat
+    if seed is not None:
+        config["seed"] = seed
+    return config
+
+
+# Pad van de dt-geschiedenis naast een uitvoerbestand: posities.csv -> posities.dt.csv
+def dt_pad(uitvoerpad):
+    stam, _ = os.path.splitext(os.path.normpath(uitvoerpad))
+    return f"{stam}.dt.csv"
+
+
+# Draai het systeem uit een (al ingelezen) config en schrijf het traject weg.
+# Naast de uitvoer komt een profiel (zie profiel.py): tijd per fase, stappen,
+# krachtevaluaties, samples en bytes. Geeft het aantal bewaarde rijen terug.
+# Met "adaptief" in de integrator-sectie, bv.
+#   "integrator": {"methode": "leapfrog", "dt": 100000, "stappen": 5000000,
+#                  "adaptief": {"eta": 0.002, "criterium": "afstand", "dt_max": 200000}}
+# kiest integratoren.integreer_adaptief de tijdstap per stap (met dezelfde stapfunctie,
+# inclusief "opties") en loopt de run tot stappen * dt seconden. De tijdkolom is dan
+# t / eenheid (bij eenheid "stap": t / dt) en de dt-geschiedenis (t, dt) komt naast de
+# uitvoer in <stam>.dt.csv, ook als de run wordt afgebroken. Sampling "log" kan dan niet.
+# "opties" in de integrator-sectie gaan als extra argumenten naar de stapfunctie, bv.
+#   "integrator": {"methode": "leapfrog_boom", "opties": {"theta": 0.5}}
+# voor Barnes-Hut-krachten met openingshoek 0.5 (zie boomcode.py).
+def draai(config):
+    profiel = Profiel()
+    integrator = config["integrator"]
+    dt, stappen = integrator["dt"], integrator["stappen"]
+    methode = integrator.get("methode", "euler")
+    stapfunctie = INTEGRATOREN[methode]
+    if integrator.get("opties"):
+        stapfunctie = partial(stapfunctie, **integrator["opties"])
+    G = config.get("G", G_STANDAARD)
+    uitvoer = config.get("uitvoer", {})
+    adaptief = integrator.get("adaptief")
+
+    with profiel.fase("opbouw"):
+        namen, massas, pos, vel = bouw_systeem(config)
+    indices, prefixen = uitvoer_lichamen(config)
+
+    # Tijdkolom: het stapnummer (geheel getal) of stap * dt / eenheid
+    tijd = uitvoer.get("tijd", {"kolom": "stap", "eenheid": "stap"})
+    if adaptief is not None:
+        eenheid = dt if tijd["eenheid"] == "stap" else tijd["eenheid"]
+        tijdwaarde, gehele_kolommen = (lambda t: t / eenheid), ()
+    elif tijd["eenheid"] == "stap":
+        tijdwaarde, gehele_kolommen = (lambda step: step), (tijd["kolom"],)
+    else:
+        tijdwaarde, gehele_kolommen = (lambda step: step * dt / tijd["eenheid"]), ()
+    kolommen = [tijd["kolom"]] + [f"{p}_{as_}" for p in prefixen for as_ in "xyz"[:pos.shape[1]]]
+
+    # Samples gaan direct naar de schrijver; alleen een staart wordt tot het eind vastgehouden
+    def sla_op(step, p):
+        schrijver.voeg_toe(tijdwaarde(step), *p[indices].ravel())
+
+    # Adaptief is het aantal stappen vooraf onbekend; een sample is dan (t, posities...)
+    def sla_op_adaptief(step, rij):
+        schrijver.voeg_toe(tijdwaarde(rij[0]), *rij[1:])
+
+    # Het plan eerst, zodat een ongeldige sampling faalt voordat er uitvoer is aangemaakt
+    if adaptief is None:
+        sampler = sampler_uit_config(config.get("sampling", {}), stappen, uit=sla_op)
+    else:
+        sampler = sampler_uit_config(config.get("sampling", {}), None, uit=sla_op_adaptief)
+
+    pad = uitvoer.get("pad", f"posities_{config.get('naam', 'systeem')}.csv")
+    if uitvoer.get("formaat", "csv") == "bin":
+        metadata = {"G": G, "dt": dt, "methode": methode, "namen": namen,
+                    "massas": np.asarray(massas).tolist()}
+        schrijver = BinaireTrajectSchrijver(pad, kolommen, metadata=metadata)
+    else:
+        schrijver = TrajectSchrijver(pad, kolommen, gehele_kolommen=gehele_kolommen)
+
+    # Optioneel behoudswetten controleren, bv.
+    #   "diagnostiek": {"elke": 10000, "max_energiefout": 1e-3, "actie": "stop", "pad": "diag.csv"}
+    opties = dict(config.get("diagnostiek", {}))
+    diagnostiek_pad = opties.pop("pad", None)
+    diagnostiek = Diagnostiek(pos, vel, massas, dt, G=G, **opties) if "diagnostiek" in config else None
+
+    # Live voortgang (zie telemetrie.py), ook aan met een sectie "telemetrie": {"elke": 10000}
+    telemetrie = Telemetrie(config.get("naam", pad), stappen, dt, massas, pos, vel, G=G,
+                            actief="telemetrie" in config or telemetrie_aan(),
+                            **config.get("telemetrie", {}))
+
+    def bij_stap(step, pos, vel):
+        sampler.bij_stap(step, pos, vel)
+        if diagnostiek is not None:
+            diagnostiek.bij_stap(step, pos, vel)
+        telemetrie.bij_stap(step, pos, vel)
+
+    def bij_blok(eind, steps, pos_samples, vel_samples, pos, vel):
+        sampler.bij_blok(eind, steps, pos_samples, vel_samples, pos, vel)
+        if diagnostiek is not None:
+            diagnostiek.bij_blok(eind, steps, pos_samples, vel_samples, pos, vel)
+        telemetrie.bij_blok(eind, steps, pos_samples, vel_samples, pos, vel)
+
+    def bij_stap_adaptief(step, t, pos, vel):
+        if sampler.kies(step, pos, vel):
+            sampler.neem(step, np.concatenate(([t], pos[indices].ravel())))
+        if diagnostiek is not None:
+            diagnostiek.bij_stap(step, pos, vel)
+        telemetrie.bij_stap(step, pos, vel)
+
+    # Per stap aangeroepen functies worden 1 op de 64 keer getimed (zie Profiel.meet)
+    gedaan, afgebroken = stappen, False
+    kernel = methode in KERNEL_METHODEN and pos.shape[-1] == 2 and adaptief is None
+    geschiedenis = None if adaptief is None else []
+    if not kernel:
+        stapfunctie = profiel.meet("stapfunctie", stapfunctie, 64, telt="krachtevaluaties")
+    t0 = time.perf_counter()
+    with schrijver:
+        try:
+            with profiel.fase("integratie"):
+                if adaptief is not None:
+                    integreer_adaptief(pos, vel, massas, stappen * dt, methode,
+                                       bij_stap=profiel.meet("bij_stap", bij_stap_adaptief, 64), G=G,
+                                       stapfunctie=stapfunctie, geschiedenis=geschiedenis, **adaptief)
+                elif kernel:
+                    blok = diagnostiek.elke if diagnostiek is not None else 10000
+                    simuleer_snel(pos, vel, massas, dt, stappen, profiel.meet("bewaar", sampler.bewaar),
+                                  profiel.meet("bij_blok", bij_blok), blok=blok, methode=methode, G=G)
+                else:
+                    simuleer(pos, vel, massas, dt, stappen, profiel.meet("bij_stap", bij_stap, 64), G=G,
+                             stapfunctie=stapfunctie)
+        except DriftTeGroot as fout:
+            print(f"❌ Simulatie afgebroken bij {fout}")
+            gedaan, afgebroken = fout.step, True
+        if geschiedenis is not None:
+            # Adaptief: ook na een afbreking de stappen tot dan toe (niet het stapnummer uit 'fout')
+            geschiedenis = np.array(geschiedenis).reshape(-1, 2)
+            gedaan = len(geschiedenis)
+        telemetrie.sluit("afgebroken" if afgebroken else "klaar")
+        with profiel.fase("afronden"):
+            sampler.sluit()
+    duur = time.perf_counter() - t0
+    profiel.tel("stappen", gedaan)
+    if kernel:
+        profiel.tel("krachtevaluaties", gedaan)   # de kernelmethoden doen één evaluatie per stap
+    profiel.schrijver(schrijver)
+    if diagnostiek is not None:
+        print(diagnostiek.rapport())
+        if diagnostiek_pad:
+            diagnostiek.naar_csv(diagnostiek_pad)
+
+    rijen = schrijver.geschreven
+    if geschiedenis is not None:
+        bereik = f", dt = {geschiedenis[:, 1].min():.4g} .. {geschiedenis[:, 1].max():.4g} s" if gedaan else ""
+        t_eind = geschiedenis[-1, 0] if gedaan else 0.0
+        print(f"✅ {config.get('naam', pad)}: {gedaan} adaptieve stappen ({methode}{bereik}) tot "
+              f"t = {t_eind:.4g} van {stappen * dt:.4g} s in {duur:.1f} s, {rijen} rijen opgeslagen in '{pad}'.")
+        np.savetxt(dt_pad(pad), geschiedenis, delimiter=",", header="t,dt", comments="")
+        print(f"✅ dt-geschiedenis opgeslagen in '{dt_pad(pad)}'.")
+    else:
+        print(f"✅ {config.get('naam', pad)}: {gedaan} van {stappen} stappen ({methode}, dt = {dt} s) "
+              f"in {duur:.1f} s, {rijen} rijen opgeslagen in '{pad}'.")
+    print(profiel.rapport())
+    profiel.schrijf(profiel_pad(pad))
+    return rijen
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Draai een systeem uit een configuratiebestand (zie systemen/)")
+    parser.add_argument("config", help="pad naar de JSON-config, bv. systemen/gliese876_bc.json")
+    parser.add_argument("--stappen", type=int)
+    parser.add_argument("--dt", type=float)
+    parser.add_argument("--methode", choices=sorted(INTEGRATOREN))
+    parser.add_argument("--uitvoer", help="pad van het uitvoerbestand (of de map bij --formaat bin)")
+    parser.add_argument("--formaat", choices=["csv", "bin"])
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--eta", type=float, help="adaptieve tijdstap met deze nauwkeurigheid (zie integratoren.tijdstap)")
+    parser.add_argument("--criterium", choices=["afstand", "jerk"], help="criterium voor de adaptieve tijdstap")
+    parser.add_argument("--theta", type=float, help="openingshoek voor --methode leapfrog_boom")
+    parser.add_argument("--telemetrie", action="store_true", help="live voortgang op localhost (zie telemetrie.py)")
+    args = parser.parse_args()
+
+    config = pas_toe(lees_config(args.config), args.stappen, args.dt, args.methode,
+                     args.uitvoer, args.formaat, args.seed, args.eta, args.criterium, args.theta)
+    draai(config)
@@ -0,0 +1,270 @@
+import math
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+
+# Ringbuffer met vaste capaciteit: als hij vol is, overschrijft een nieuwe rij de oudste.
+# De opslag wordt gealloceerd bij de eerste rij (dan is de vorm van een sample bekend)
+# en groeit daarna nooit meer.
+class Ringbuffer:
+    def __init__(self, capaciteit):
+        self.capaciteit = capaciteit
+        self.steps = np.empty(capaciteit, dtype=np.int64)
+        self.data = None
+        self.n = 0              # totaal aantal toegevoegde rijen (ook de overschreven)
+
+    def __len__(self):
+        return min(self.n, self.capaciteit)
+
+    def voeg_toe(self, step, waarden):
+        if self.capaciteit == 0:
+            return
+        if self.data is None:
+            self.data = np.empty((self.capaciteit,) + np.shape(waarden))
+        i = self.n % self.capaciteit
+        self.steps[i] = step
+        self.data[i] = waarden
+        self.n += 1
+
+    # Stapnummers en samples in chronologische volgorde
+    def inhoud(self):
+        if self.data is None:
+            return self.steps[:0], np.empty((0,))
+        if self.n <= self.capaciteit:
+            return self.steps[:self.n], self.data[:self.n]
+        volgorde = np.roll(np.arange(self.capaciteit), -(self.n % self.capaciteit))
+        return self.steps[volgorde], self.data[volgorde]
+
+
+# Basis voor alle bemonsteringsplannen.
+# bewaar(steps) zegt per stap of die bewaard moet worden en werkt zowel op één stapnummer
+# als op een array (voor kernel.simuleer_snel); neem(step, waarden) slaat een sample op.
+# Zonder 'uit' gaat alles naar vooraf gealloceerde buffers en geeft resultaat() de samples
+# terug. Met uit(step, waarden) gaan samples die vaststaan direct door (bv. naar een
+# TrajectSchrijver) en houdt het plan alleen vast wat nog kan veranderen (de staart);
+# sluit() geeft die aan het eind door.
+# bij_stap en bij_blok hebben dezelfde vorm als de hooks van nbody.simuleer en
+# kernel.simuleer_snel en bewaren de posities. kies(step, pos, vel) beslist met de toestand
+# erbij; standaard is dat gewoon bewaar(step).
+# bewaar, neem en resultaat moet elk plan zelf invullen; een onvolledig plan faalt al
+# bij het aanmaken.
+class Sampler(ABC):
+    def __init__(self, uit=None):
+        self.uit = uit
+
+    @abstractmethod
+    def bewaar(self, step):
+        pass
+
+    @abstractmethod
+    def neem(self, step, waarden):
+        pass
+
+    @abstractmethod
+    def resultaat(self):
+        pass
+
+    def sluit(self):
+        pass
+
+    def neem_blok(self, steps, waarden):
+        for step, w in zip(steps, waarden):
+            self.neem(int(step), w)
+
+    def kies(self, step, pos, vel):
+        return self.bewaar(step)
+
+    def bij_stap(self, step, pos, vel):
+        if self.kies(step, pos, vel):
+            self.neem(step, pos)
+
+    def bij_blok(self, eind, steps, pos_samples, vel_samples, pos, vel):
+        self.neem_blok(steps, pos_samples)
+
+    # Samples als arrays voor een checkpoint, en weer terug
+    def toestand(self):
+        steps, data = self.resultaat()
+        return {"steps": steps, "data": data}
+
+    def herstel(self, steps, data):
+        for step, w in zip(steps, data):
+            self.neem(int(step), w)
+
+    # Geef een sample door aan 'uit', of bewaar het in de buffer
+    def _door(self, buffer, step, waarden):
+        if self.uit is None:
+            buffer.voeg_toe(step, waarden)
+        else:
+            self.uit(step, waarden)
+
+
+# Plak de inhoud van een paar buffers achter elkaar
+def _samen(*buffers):
+    delen = [b.inhoud() for b in buffers if len(b)]
+    if not delen:
+        return np.empty(0, dtype=np.int64), np.empty((0,))
+    return np.concatenate([s for s, _ in delen]), np.concatenate([d for _, d in delen])
+
+
+# De eerste n en de laatste n stappen. De staart zit in een ringbuffer van n rijen, dus
+# het geheugen is 2n samples, hoe lang de run ook duurt. Met 'stappen' worden alleen de
+# echte laatste n stappen aangeboden; zonder (einde onbekend, bv. een run die eerder
+# stopt) gaat elke stap na de kop door de ringbuffer.
+class KopStaart(Sampler):
+    def __init__(self, n, stappen=None, uit=None):
+        super().__init__(uit)
+        self.n = n
+        self.stappen = stappen
+        self.kop = Ringbuffer(n)
+        self.staart = Ringbuffer(n)
+
+    def bewaar(self, step):
+        if self.stappen is None:
+            return step >= 0
+        return (step < self.n) | (step >= self.stappen - self.n)
+
+    def neem(self, step, waarden):
+        if step < self.n:
+            self._door(self.kop, step, waarden)
+        else:
+            self.staart.voeg_toe(step, waarden)
+
+    def resultaat(self):
+        return _samen(self.kop, self.staart)
+
+    def sluit(self):
+        if self.uit is not None:
+            for step, w in zip(*self.staart.inhoud()):
+                self.uit(int(step), w)
+            self.staart = Ringbuffer(self.n)
+
+
+# Elke k-de stap. Zonder 'uit' is 'stappen' nodig om de buffer vooraf te alloceren.
+class ElkeK(Sampler):
+    def __init__(self, k, stappen=None, uit=None):
+        super().__init__(uit)
+        if uit is None and stappen is None:
+            raise ValueError("ElkeK zonder 'uit' heeft 'stappen' nodig")
+        self.k = k
+        self.buffer = Ringbuffer(math.ceil(stappen / k) if uit is None else 0)
+
+    def bewaar(self, step):
+        return step % self.k == 0
+
+    def neem(self, step, waarden):
+        self._door(self.buffer, step, waarden)
+
+    def resultaat(self):
+        return self.buffer.inhoud()
+
+
+# Ongeveer n stappen, logaritmisch verdeeld over [0, stappen): dicht opeen aan het begin
+# (snelle transiënten), steeds verder uit elkaar naar het eind (lange-termijngedrag).
+# Heeft 'stappen' altijd nodig, dus niet bij een adaptieve tijdstap.
+class LogSchaal(Sampler):
+    def __init__(self, n, stappen, uit=None):
+        super().__init__(uit)
+        if stappen is None:
+            raise ValueError("LogSchaal heeft 'stappen' nodig (sampling \"log\" kan niet bij een adaptieve tijdstap)")
+        self.doelen = np.unique(np.rint(np.geomspace(1, stappen, n)).astype(np.int64)) - 1
+        self.buffer = Ringbuffer(len(self.doelen) if uit is None else 0)
+
+    def bewaar(self, step):
+        return np.isin(step, self.doelen)
+
+    def neem(self, step, waarden):
+        self._door(self.buffer, step, waarden)
+
+    def resultaat(self):
+        return self.buffer.inhoud()
+
+
+# Samples bij gebeurtenissen (periapsis, doorgang, nadering, ...). De gebeurtenis
+# wordt bepaald door voorwaarde(step, pos, vel), of van buitenaf gemeld met neem()
+# (bv. vanuit analyse.GebeurtenisDetector). Met een voorwaarde is elke stap een
+# kandidaat: bewaar() is dan overal waar, zodat kernel.simuleer_snel elke stap van een
+# blok aanlevert (geheugen: blok x lichamen), en bij_blok houdt alleen de stappen waarin
+# de voorwaarde waar is. Bewaart de laatste 'capaciteit' gebeurtenissen; 'gemist' telt
+# wat daardoor overschreven is.
+class BijGebeurtenis(Sampler):
+    def __init__(self, capaciteit, voorwaarde=None, uit=None):
+        super().__init__(uit)
+        self.voorwaarde = voorwaarde
+        self.buffer = Ringbuffer(capaciteit if uit is None else 0)
+
+    @property
+    def gemist(self):
+        return max(0, self.buffer.n - self.buffer.capaciteit)
+
+    def bewaar(self, step):
+        return np.full(np.shape(step), self.voorwaarde is not None)
+
+    def kies(self, step, pos, vel):
+        return self.voorwaarde is not None and bool(self.voorwaarde(step, pos, vel))
+
+    def bij_blok(self, eind, steps, pos_samples, vel_samples, pos, vel):
+        for step, p, v in zip(steps.tolist(), pos_samples, vel_samples):
+            if self.kies(step, p, v):
+                self.neem(step, p)
+
+    def neem(self, step, waarden):
+        self._door(self.buffer, step, waarden)
+
+    def resultaat(self):
+        return self.buffer.inhoud()
+
+
+# Voorwaarde voor BijGebeurtenis: lichaam 'lichaam' t.o.v. 'centrum' (indices in de
+# toestand) passeert in deze stap
+#   "periapsis": de radiale snelheid r·v gaat van < 0 naar >= 0
+#   "doorgang":  y gaat van < 0 naar >= 0 (de overgang die tel_omlopen telt)
+#   "nadering":  de afstand komt onder 'afstand' (m)
+def gebeurtenis(soort, lichaam, centrum=0, afstand=None):
+    if soort == "periapsis":
+        grootheid = lambda r, v: float(np.dot(r, v))
+    elif soort == "doorgang":
+        grootheid = lambda r, v: float(r[1])
+    elif soort == "nadering":
+        if afstand is None:
+            raise ValueError("gebeurtenis 'nadering' heeft 'afstand' nodig")
+        grootheid = lambda r, v: afstand - float(np.linalg.norm(r))
+    else:
+        raise ValueError(f"onbekende gebeurtenis {soort!r}")
+    vorige = None
+
+    def voorwaarde(step, pos, vel):
+        nonlocal vorige
+        waarde = grootheid(pos[lichaam] - pos[centrum], vel[lichaam] - vel[centrum])
+        wissel = vorige is not None and vorige < 0 <= waarde
+        vorige = waarde
+        return wissel
+    return voorwaarde
+
+
+# Bemonsteringsplan uit een config (zie systemen/ en run.py):
+#   {"soort": "elke", "k": 240}        elke k-de stap
+#   {"soort": "kop", "n": 10000}       de eerste n stappen
+#   {"soort": "kop_staart", "n": 1000} de eerste en laatste n stappen
+#   {"soort": "log", "n": 500}         ~n stappen, logaritmisch verdeeld (niet adaptief)
+#   {"soort": "alles"}
+#   {"soort": "gebeurtenis", "gebeurtenis": "periapsis", "lichaam": 1, "capaciteit": 10000}
+#                                      de stappen met een gebeurtenis (zie gebeurtenis()),
+#                                      ook met "centrum" en, bij "nadering", "afstand"
+def sampler_uit_config(sampling, stappen, uit=None):
+    soort = sampling.get("soort", "alles")
+    if soort == "elke":
+        return ElkeK(sampling["k"], stappen, uit)
+    if soort == "kop":
+        return KopStaart(sampling["n"], stappen=math.inf, uit=uit)
+    if soort == "kop_staart":
+        return KopStaart(sampling["n"], stappen, uit)
+    if soort == "log":
+        return LogSchaal(sampling["n"], stappen, uit)
+    if soort == "alles":
+        return ElkeK(1, stappen, uit)
+    if soort == "gebeurtenis":
+        voorwaarde = gebeurtenis(sampling["gebeurtenis"], sampling["lichaam"],
+                                 sampling.get("centrum", 0), sampling.get("afstand"))
+        return BijGebeurtenis(sampling.get("capaciteit", 10000), voorwaarde, uit)
+    raise ValueError(f"onbekende sampling {soort!r}")
@@ -0,0 +1,155 @@
+import argparse
+import csv
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from ensemble import M_JUPITER, IO, EUROPA, Maan, ensemble
+from telemetrie import GestoptDoorMonitor, telemetrie_aan
+
+# Kolommen van het resultatenbestand: één rij per run
+KOLOMMEN = ["punt", "herhaling", "onderling", "e_io", "e_eu", "a_io", "a_eu", "m_io", "m_eu",
+            "theta_io", "theta_eu", "omlopen_io", "omlopen_eu", "verhouding"]
+
+
+# Alle combinaties van de parameterwaarden, elk punt met een vast volgnummer
+def parameter_grid(e_io, e_eu, a_io, a_eu, m_io, m_eu, onderling):
+    punten = []
+    for i, combi in enumerate(itertools.product(onderling, e_io, e_eu, a_io, a_eu, m_io, m_eu)):
+        o, ei, ee, ai, ae, mi, me = combi
+        punten.append(dict(punt=i, onderling=o, e_io=ei, e_eu=ee, a_io=ai, a_eu=ae, m_io=mi, m_eu=me))
+    return punten
+
+
+# Verdeel het grid in werkeenheden van hoogstens 'grootte' punten.
+# Punten met en zonder onderlinge gravitatie komen nooit in dezelfde eenheid.
+# De indeling hangt alleen van het grid af, zodat een hervatte sweep dezelfde eenheden krijgt.
+def werkeenheden(punten, grootte):
+    eenheden = []
+    for onderling in (True, False):
+        groep = [p for p in punten if p["onderling"] == onderling]
+        for i in range(0, len(groep), grootte):
+            eenheden.append(groep[i:i + grootte])
+    return eenheden
+
+
+# Draai één werkeenheid als één ensemble: alle punten x herhalingen tegelijk
+def draai_eenheid(eenheid, herhalingen, dt, stappen, elke, seed):
+    punten = [p for p in eenheid for _ in range(herhalingen)]
+    kolom = lambda k: np.array([p[k] for p in punten], dtype=float)
+    io = Maan("Io", kolom("m_io"), kolom("a_io"), kolom("e_io"))
+    eu = Maan("Europa", kolom("m_eu"), kolom("a_eu"), kolom("e_eu"))
+
+    # Seed per eenheid, afgeleid van het eerste punt: hervatten geeft dezelfde fases.
+    tabel = ensemble(M_JUPITER, [io, eu], len(punten), dt, stappen,
+                     onderling=eenheid[0]["onderling"], elke=elke,
+                     seed=None if seed is None else [seed, eenheid[0]["punt"]],
+                     telemetrie=f"sweep_punt{eenheid[0]['punt']}" if telemetrie_aan() else None)
+    # Gestopt via telemetrie.py: een halve eenheid komt niet in het resultatenbestand
+    if tabel["stappen"][0] < stappen:
+        raise GestoptDoorMonitor(int(tabel["stappen"][0]))
+
+    rijen = []
+    for r, p in enumerate(punten):
+        rijen.append([p["punt"], r % herhalingen, int(p["onderling"]),
+                      p["e_io"], p["e_eu"], p["a_io"], p["a_eu"], p["m_io"], p["m_eu"],
+                      tabel["theta_Io"][r], tabel["theta_Europa"][r],
+                      int(tabel["omlopen_Io"][r]), int(tabel["omlopen_Europa"][r]),
+                      tabel["verhouding_Io_Europa"][r]])
+    return rijen
+
+
+# Lees de rijen van het resultatenbestand, één per (punt, herhaling).
+# Een half weggeschreven eenheid die opnieuw gedraaid is, telt maar één keer.
+def lees_rijen(pad):
+    if not os.path.exists(pad):
+        return {}
+    with open(pad, newline="") as f:
+        return {(int(rij["punt"]), int(rij["herhaling"])): rij for rij in csv.DictReader(f)}
+
+
+# Punten waarvan alle herhalingen al in het resultatenbestand staan
+def klaar_punten(pad, herhalingen):
+    aantal = {}
+    for punt, _ in lees_rijen(pad):
+        aantal[punt] = aantal.get(punt, 0) + 1
+    return {punt for punt, n in aantal.items() if n >= herhalingen}
+
+
+# Lees het resultatenbestand in als één tabel (dict met kolommen)
+def lees_resultaten(pad):
+    per_run = lees_rijen(pad)
+    rijen = [per_run[k] for k in sorted(per_run)]
+    return {k: np.array([float(rij[k]) for rij in rijen]) for k in KOLOMMEN}
+
+
+# Voer de sweep uit over een pool van processen.
+# Elke afgeronde werkeenheid wordt direct aan 'pad' toegevoegd; bij een herstart
+# worden eenheden waarvan alle punten al in het bestand staan overgeslagen.
+def sweep(punten, pad, herhalingen=1, dt=3600, stappen=240000, elke=240,
+          grootte=4, processen=None, seed=0):
+    klaar = klaar_punten(pad, herhalingen)
+    todo = [e for e in werkeenheden(punten, grootte)
+            if not all(p["punt"] in klaar for p in e)]
+    print(f"🧮 {len(punten)} punten, {len(todo)} werkeenheden te gaan ({len(klaar)} punten al klaar)")
+
+    nieuw = not os.path.exists(pad)
+    with open(pad, "a", newline="") as f, ProcessPoolExecutor(processen) as pool:
+        writer = csv.writer(f)
+        if nieuw:
+            writer.writerow(KOLOMMEN)
+            f.flush()
+        taken = [pool.submit(draai_eenheid, e, herhalingen, dt, stappen, elke, seed) for e in todo]
+        for i, taak in enumerate(as_completed(taken), start=1):
+            try:
+                writer.writerows(taak.result())
+            except GestoptDoorMonitor as fout:
+                # Gestopt via telemetrie.py: niets weggeschreven, bij hervatten opnieuw
+                print(f"  eenheid {i}/{len(todo)} gestopt bij {fout}")
+                continue
+            f.flush()
+            print(f"  eenheid {i}/{len(todo)} klaar")
+
+    return lees_resultaten(pad)
+
+
+def lijst(tekst):
+    return [float(x) for x in tekst.split(",")]
+
+
+def ja_nee(tekst):
+    return [x.strip() in ("ja", "1", "true") for x in tekst.split(",")]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parameter-sweep van Io/Europa-resonantie over meerdere processen")
+    parser.add_argument("--e_io", type=lijst, default=[IO.e])
+    parser.add_argument("--e_eu", type=lijst, default=[EUROPA.e])
+    parser.add_argument("--a_io", type=lijst, default=[IO.a])
+    parser.add_argument("--a_eu", type=lijst, default=[EUROPA.a])
+    parser.add_argument("--m_io", type=lijst, default=[IO.massa])
+    parser.add_argument("--m_eu", type=lijst, default=[EUROPA.massa])
+    parser.add_argument("--onderling", type=ja_nee, default=[True, False],
+                        help="met/zonder onderlinge gravitatie, bv. 'ja,nee'")
+    parser.add_argument("--herhalingen", type=int, default=10, help="runs met random fase per punt")
+    parser.add_argument("--stappen", type=int, default=240000)
+    parser.add_argument("--dt", type=float, default=3600)
+    parser.add_argument("--chunk", type=int, default=4, help="punten per werkeenheid")
+    parser.add_argument("--processen", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--uitvoer", default="sweep.csv")
+    args = parser.parse_args()
+
+    punten = parameter_grid(args.e_io, args.e_eu, args.a_io, args.a_eu,
+                            args.m_io, args.m_eu, args.onderling)
+    res = sweep(punten, args.uitvoer, args.herhalingen, args.dt, args.stappen,
+                grootte=args.chunk, processen=args.processen, seed=args.seed)
+
+    for onderling in (1, 0):
+        sel = res["onderling"] == onderling
+        if sel.any():
+            resonant = np.mean(res["omlopen_io"][sel] == 2 * res["omlopen_eu"][sel])
+            label = "met" if onderling else "zonder"
+            print(f"➤ {label} onderlinge gravitatie: 2:1 in {resonant:.1%} van {sel.sum()} runs")
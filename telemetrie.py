@@ -0,0 +1,240 @@
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from nbody import G, energie
+from diagnostiek import DriftTeGroot
+from kepler import elementen
+
+# Registratie van lopende runs: één klein JSON-bestand per run met naam, pid en url,
+# zodat de monitor (python telemetrie.py) alle workers op deze machine kan vinden
+TELEMETRIE_MAP = ".telemetrie"
+
+
+# Telemetrie aan met --telemetrie op de command line of NBODY_TELEMETRIE in de omgeving
+# ("1" = vrije poort, een ander getal = die poort). Net als figuren.headless(), zodat
+# sweep-workers het via de omgeving erven. Alle scripts (main*.py, gliese.py, run.py,
+# sweep.py, ensemble.py) geven hun Telemetrie actief=telemetrie_aan() mee; uit kost het niets.
+# Een vaste poort geldt alleen voor het hoofdproces: workers (multiprocessing) krijgen
+# altijd een vrije poort, anders zou alleen de eerste de poort kunnen openen.
+def telemetrie_aan():
+    return "--telemetrie" in sys.argv or os.environ.get("NBODY_TELEMETRIE", "0") not in ("", "0")
+
+
+def _poort():
+    waarde = os.environ.get("NBODY_TELEMETRIE", "1")
+    if multiprocessing.parent_process() is not None:
+        return 0
+    return int(waarde) if waarde.isdigit() and waarde != "1" else 0
+
+
+# Een run die via de monitor (POST /stop) is gestopt. Het is een DriftTeGroot, zodat de
+# scripts hem net zo afhandelen als een stop door de diagnostiek: uitvoer afronden en
+# de telemetrie sluiten met status "afgebroken".
+class GestoptDoorMonitor(DriftTeGroot):
+    def __init__(self, step):
+        super().__init__(step, "gestopt door de monitor")
+
+    # Zo komt hij heel terug uit een sweep-worker (ProcessPoolExecutor pickelt hem)
+    def __reduce__(self):
+        return GestoptDoorMonitor, (self.step,)
+
+
+# Live voortgang van een run via HTTP op localhost: GET / (of /metrics) geeft JSON met
+# stap, gesimuleerde tijd, stappen/s, ETA, energiefout en de huidige omloopverhouding.
+# POST /stop vraagt de run te stoppen: bij de volgende update gooit werk_bij
+# GestoptDoorMonitor.
+# De server draait in een achtergrondthread en leest alleen een dict die de run bij
+# elke update in één keer vervangt; de run zelf wacht dus nooit op een verzoek.
+# Bijwerken gebeurt elke 'elke' stappen (bij_stap) of per kernelblok (bij_blok) en kost
+# dan één energieberekening. Met actief=False doet alles niets (geen server, geen kosten).
+# Omloopverhouding: P_buiten / P_binnen uit de osculerende halve lange assen (bij een
+# batch runs de mediaan; de energiefout is dan de grootste over alle runs).
+class Telemetrie:
+    def __init__(self, naam, stappen, dt, massas=None, pos=None, vel=None, binnen=1, buiten=2,
+                 centrum=0, elke=10000, start=0, actief=True, poort=None, G=G):
+        self.actief = actief
+        self.naam, self.stappen, self.dt = naam, stappen, dt
+        self.elke = elke
+        self.G = G
+        self.lichamen = (centrum, binnen, buiten)
+        self.massas = None if massas is None else np.asarray(massas, dtype=float)
+        self.E0 = None
+        if actief and self.massas is not None and pos is not None:
+            self.E0 = energie(pos, vel, self.massas, G)
+        self._vorige = (start, time.time())
+        self._begin = self._vorige
+        self.toestand = {"naam": naam, "pid": os.getpid(), "status": "loopt", "stap": start,
+                         "stappen": stappen, "bijgewerkt": time.time()}
+        self.server = None
+        self.registratie = None
+        self.stop_gevraagd = False
+        if actief:
+            self._start_server(_poort() if poort is None else poort)
+
+    def _start_server(self, poort):
+        telemetrie = self
+
+        class Verzoek(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                toestand = dict(telemetrie.toestand)
+                toestand["leeftijd_s"] = time.time() - toestand["bijgewerkt"]
+                inhoud = json.dumps(toestand).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(inhoud)))
+                self.end_headers()
+                self.wfile.write(inhoud)
+
+            def do_POST(self):
+                if self.path != "/stop":
+                    self.send_error(404)
+                    return
+                telemetrie.stop_gevraagd = True
+                self.send_response(202)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", poort), Verzoek)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+
+        os.makedirs(TELEMETRIE_MAP, exist_ok=True)
+        self.registratie = os.path.join(TELEMETRIE_MAP, f"{self.naam}_{os.getpid()}.json")
+        with open(self.registratie, "w") as f:
+            json.dump({"naam": self.naam, "pid": os.getpid(), "url": self.url}, f)
+        print(f"📡 Telemetrie van '{self.naam}' op {self.url}")
+
+    def _omloopverhouding(self, pos, vel):
+        c, i, j = self.lichamen
+        if pos.shape[-2] <= max(i, j):
+            return None
+        m = self.massas
+        a_i, _, _, _ = elementen(pos[..., i, :] - pos[..., c, :], vel[..., i, :] - vel[..., c, :],
+                                 self.G * (m[..., c] + m[..., i]))
+        a_j, _, _, _ = elementen(pos[..., j, :] - pos[..., c, :], vel[..., j, :] - vel[..., c, :],
+                                 self.G * (m[..., c] + m[..., j]))
+        verhouding = (a_j / a_i) ** 1.5 * np.sqrt((m[..., c] + m[..., i]) / (m[..., c] + m[..., j]))
+        return float(np.median(verhouding))
+
+    # Nieuwe toestand na 'stap' afgeronde stappen; extra velden (bv. omlooptellingen)
+    # worden meegestuurd
+    def werk_bij(self, stap, pos=None, vel=None, **extra):
+        if not self.actief:
+            return
+        if self.stop_gevraagd:
+            raise GestoptDoorMonitor(stap)
+        nu = time.time()
+        vorige_stap, vorige_tijd = self._vorige
+        snelheid = (stap - vorige_stap) / (nu - vorige_tijd) if nu > vorige_tijd else None
+        toestand = {"naam": self.naam, "pid": os.getpid(), "status": "loopt", "stap": stap,
+                    "stappen": self.stappen, "voortgang": stap / self.stappen if self.stappen else 1.0,
+                    "sim_tijd_s": stap * self.dt, "sim_tijd_dagen": stap * self.dt / 86400,
+                    "stappen_per_s": snelheid,
+                    "eta_s": (self.stappen - stap) / snelheid if snelheid else None,
+                    "looptijd_s": nu - self._begin[1], "bijgewerkt": nu}
+        if pos is not None and self.massas is not None:
+            if self.E0 is not None:
+                E = energie(pos, vel, self.massas, self.G)
+                toestand["energiefout"] = float(np.max(np.abs((E - self.E0) / self.E0)))
+            toestand["omloopverhouding"] = self._omloopverhouding(pos, vel)
+        toestand.update(extra)
+        self.toestand = toestand
+        self._vorige = (stap, nu)
+
+    def bij_stap(self, step, pos, vel):
+        if self.actief and (step + 1) % self.elke == 0:
+            self.werk_bij(step + 1, pos, vel)
+
+    def bij_blok(self, eind, steps, pos_samples, vel_samples, pos, vel):
+        self.werk_bij(eind, pos, vel)
+
+    # Eindstatus ("klaar", "afgebroken") en de server stoppen
+    def sluit(self, status="klaar"):
+        if not self.actief:
+            return
+        self.toestand = dict(self.toestand, status=status, bijgewerkt=time.time())
+        self.server.shutdown()
+        self.server.server_close()
+        if self.registratie and os.path.exists(self.registratie):
+            os.remove(self.registratie)
+        self.actief = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, soort, *exc):
+        self.sluit("klaar" if soort is None else "afgebroken")
+
+
+# Haal de toestand van alle geregistreerde runs op; een run die niet meer antwoordt
+# (proces weg zonder afmelden) krijgt status "weg"
+def verzamel(map_=TELEMETRIE_MAP, timeout=1.0):
+    runs = []
+    for pad in sorted(glob.glob(os.path.join(map_, "*.json"))):
+        with open(pad) as f:
+            registratie = json.load(f)
+        try:
+            with urllib.request.urlopen(registratie["url"], timeout=timeout) as antwoord:
+                toestand = json.load(antwoord)
+        except OSError:
+            toestand = dict(registratie, status="weg")
+        toestand["registratie"] = pad
+        runs.append(toestand)
+    return runs
+
+
+def _tijd(s):
+    if s is None:
+        return "?"
+    return f"{s / 3600:.1f} u" if s >= 3600 else f"{s:.0f} s"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Overzicht van lopende runs met telemetrie")
+    parser.add_argument("--stil", type=float, default=120, help="seconden zonder update = vastgelopen")
+    parser.add_argument("--max-energiefout", type=float, default=1e-2, help="hierboven = divergerend")
+    parser.add_argument("--stop", action="store_true", help="vraag vastgelopen of divergerende runs te stoppen")
+    parser.add_argument("--opruimen", action="store_true", help="verwijder registraties van runs die weg zijn")
+    args = parser.parse_args()
+
+    for run in verzamel():
+        if run["status"] == "weg":
+            print(f"✖ {run['naam']:>20} (pid {run['pid']}): reageert niet")
+            if args.opruimen:
+                os.remove(run["registratie"])
+            continue
+        problemen = []
+        if run.get("leeftijd_s", 0) > args.stil:
+            problemen.append(f"al {_tijd(run['leeftijd_s'])} geen update")
+        if run.get("energiefout") is not None and run["energiefout"] > args.max_energiefout:
+            problemen.append(f"|dE/E| = {run['energiefout']:.1e}")
+        verhouding = run.get("omloopverhouding")
+        snelheid = run.get("stappen_per_s")
+        print(f"{'⚠️' if problemen else '✓'} {run['naam']:>20} (pid {run['pid']}): "
+              f"{run['stap']}/{run['stappen']} stappen ({run.get('voortgang', 0):.1%}), "
+              f"{snelheid or 0:.0f} stappen/s, ETA {_tijd(run.get('eta_s'))}, "
+              f"|dE/E| = {run.get('energiefout', float('nan')):.1e}, "
+              f"verhouding {verhouding if verhouding is None else f'{verhouding:.4f}'}"
+              + (f"  ← {', '.join(problemen)}" if problemen else ""))
+        if problemen and args.stop:
+            with open(run["registratie"]) as f:
+                url = json.load(f)["url"]
+            urllib.request.urlopen(urllib.request.Request(url + "stop", method="POST"), timeout=1.0).close()
+            print("  → stop gevraagd (bij de volgende update)")
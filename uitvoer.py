@@ -0,0 +1,181 @@
+import csv
+import json
+import os
+import time
+
+import numpy as np
+
+
+# Schrijft een traject weg terwijl de simulatie loopt.
+# Samples komen in een vooraf gealloceerde buffer van 'chunk' rijen; zodra die vol is
+# wordt hij als één blok naar het CSV-bestand geschreven. Het geheugengebruik hangt
+# dus alleen van 'chunk' af, niet van het aantal stappen, en bij een crash staat alles
+# tot en met de laatste flush al op schijf.
+# Met 'hervat' (een eerder opgevraagde offset()) wordt een bestaand bestand op dat punt
+# afgekapt en vanaf daar verder beschreven, bv. bij het hervatten vanaf een checkpoint.
+class TrajectSchrijver:
+    def __init__(self, pad, kolommen, chunk=10000, gehele_kolommen=(), hervat=None):
+        self.pad = pad
+        self.kolommen = list(kolommen)
+        self.chunk = chunk
+        self.buffer = np.empty((chunk, len(self.kolommen)))
+        self.n = 0                  # rijen in de buffer
+        self.geschreven = 0         # rijen al op schijf
+        self.bytes_geschreven = 0   # voor profiel.py: bytes, aantal flushes en de tijd daarvan
+        self.flushes = 0
+        self.schrijftijd = 0.0
+        self.geheel = [self.kolommen.index(k) for k in gehele_kolommen]
+        self._open(hervat)
+
+    def _open(self, hervat):
+        if hervat is None:
+            self.f = open(self.pad, "w", newline="")
+            self.writer = csv.writer(self.f)
+            self.writer.writerow(self.kolommen)
+        else:
+            self.f = open(self.pad, "r+", newline="")
+            self.f.truncate(hervat)
+            self.f.seek(hervat)
+            self.writer = csv.writer(self.f)
+
+    # Positie in het uitvoerbestand na een flush (bytes voor CSV)
+    def offset(self):
+        self.flush()
+        return self.f.tell()
+
+    # Schrijf een blok rijen weg; geeft het aantal geschreven bytes terug
+    def _schrijf(self, blok):
+        voor = self.f.tell()
+        rijen = blok.tolist()
+        for rij in rijen:
+            for i in self.geheel:
+                rij[i] = int(rij[i])
+        self.writer.writerows(rijen)
+        self.f.flush()
+        return self.f.tell() - voor
+
+    def _sluit(self):
+        self.f.close()
+
+    # Voeg één sample toe (één waarde per kolom)
+    def voeg_toe(self, *waarden):
+        self.buffer[self.n] = waarden
+        self.n += 1
+        if self.n == self.chunk:
+            self.flush()
+
+    # Schrijf de gevulde buffer naar schijf
+    def flush(self):
+        if self.n == 0:
+            return
+        t0 = time.perf_counter()
+        self.bytes_geschreven += self._schrijf(self.buffer[:self.n])
+        self.schrijftijd += time.perf_counter() - t0
+        self.flushes += 1
+        self.geschreven += self.n
+        self.n = 0
+
+    def sluit(self):
+        self.flush()
+        self._sluit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.sluit()
+
+
+# Binair, kolomgewijs trajectformaat: een map met
+#   meta.json      kolomnamen, aantal rijen en vrije metadata (G, dt, massa's, e, ...)
+#   <kolom>.f64    alle waarden van die kolom als aaneengesloten float64 (little-endian)
+# Kolommen groeien per flush aan het eind, dus schrijven kan gewoon tijdens de run.
+class BinaireTrajectSchrijver(TrajectSchrijver):
+    def __init__(self, pad, kolommen, chunk=10000, metadata=None, hervat=None):
+        self.metadata = dict(metadata or {})
+        super().__init__(pad, kolommen, chunk, hervat=hervat)
+
+    def _open(self, hervat):
+        os.makedirs(self.pad, exist_ok=True)
+        self.bestanden = []
+        for k in self.kolommen:
+            bestand = os.path.join(self.pad, f"{k}.f64")
+            if hervat is None:
+                self.bestanden.append(open(bestand, "wb"))
+            else:
+                f = open(bestand, "r+b")
+                f.truncate(hervat * 8)
+                f.seek(hervat * 8)
+                self.bestanden.append(f)
+        self.geschreven = hervat or 0
+        self._schrijf_meta()
+
+    # Aantal rijen op schijf na een flush
+    def offset(self):
+        self.flush()
+        return self.geschreven
+
+    def _schrijf_meta(self):
+        meta = {"kolommen": self.kolommen, "rijen": self.geschreven, "metadata": self.metadata}
+        tijdelijk = os.path.join(self.pad, "meta.json.tmp")
+        with open(tijdelijk, "w") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tijdelijk, os.path.join(self.pad, "meta.json"))
+
+    def _schrijf(self, blok):
+        for i, f in enumerate(self.bestanden):
+            np.ascontiguousarray(blok[:, i], dtype="<f8").tofile(f)
+            f.flush()
+        return blok.shape[0] * len(self.bestanden) * 8
+
+    def flush(self):
+        super().flush()
+        self._schrijf_meta()
+
+    def _sluit(self):
+        for f in self.bestanden:
+            f.close()
+
+
+# Leest een binair traject via memory-mapping: kolommen worden pas van schijf
+# gelezen als ze (deels) gebruikt worden, dus een tijdvenster uit een groot
+# bestand kost alleen de rijen in dat venster.
+class Traject:
+    def __init__(self, pad):
+        self.pad = pad
+        with open(os.path.join(pad, "meta.json")) as f:
+            meta = json.load(f)
+        self.kolommen = meta["kolommen"]
+        self.metadata = meta["metadata"]
+        self.rijen = meta["rijen"]
+        self._kolom = {}
+
+    def __len__(self):
+        return self.rijen
+
+    def __getitem__(self, kolom):
+        if kolom not in self._kolom:
+            bestand = os.path.join(self.pad, f"{kolom}.f64")
+            if self.rijen == 0:
+                self._kolom[kolom] = np.empty(0)
+            else:
+                self._kolom[kolom] = np.memmap(bestand, dtype="<f8", mode="r", shape=(self.rijen,))
+        return self._kolom[kolom]
+
+    # Rijen [begin, eind) van de gevraagde kolommen als dict met arrays
+    def rijbereik(self, begin, eind, kolommen=None):
+        return {k: np.asarray(self[k][begin:eind]) for k in (kolommen or self.kolommen)}
+
+    # Alle rijen met t0 <= tijd < t1; de tijdkolom moet oplopend zijn
+    def venster(self, t0, t1, tijdkolom=None, kolommen=None):
+        tijd = self[tijdkolom or self.kolommen[0]]
+        begin = int(np.searchsorted(tijd, t0, side="left"))
+        eind = int(np.searchsorted(tijd, t1, side="left"))
+        return self.rijbereik(begin, eind, kolommen)
+
+    # Exporteer (in blokken, met begrensd geheugen) naar CSV
+    def naar_csv(self, pad_csv, chunk=100000, gehele_kolommen=()):
+        with TrajectSchrijver(pad_csv, self.kolommen, chunk, gehele_kolommen) as schrijver:
+            for begin in range(0, self.rijen, chunk):
+                blok = self.rijbereik(begin, min(begin + chunk, self.rijen))
+                schrijver._schrijf(np.column_stack([blok[k] for k in self.kolommen]))